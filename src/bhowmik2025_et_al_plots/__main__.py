@@ -1,17 +1,15 @@
 """
 Main function - It rewrites all the tables, + files you have chosen to plot
 with the configuration you set, + creates the LaTeX text for the images to be plotted
-on a grid of 2 columns + logs all necessary info into my_logs.log
+on a grid of 2 columns + logs all necessary info into my_logs.log.
+Without --interactive nothing is asked: the options come from the command line
+and/or a TOML file (see cli.py), so it can run as a batch job
 """
 
-import shutil
-import os
+import dataclasses
 import logging
 
-from bhowmik2025_et_al_plots import table_creator
-from bhowmik2025_et_al_plots import plotter_w_decorators
-from bhowmik2025_et_al_plots import plotter_w_decorators_w_residuals
-from bhowmik2025_et_al_plots import images_latex
+from bhowmik2025_et_al_plots import cli
 
 from bhowmik2025_et_al_plots.utils import PathUtils
 
@@ -54,15 +52,22 @@ logger.addHandler(file_handler)
 paths = PathUtils()
 
 
-def main(reverse: bool = True) -> None:
+def interactive_main(options: cli.RunOptions) -> None:
     """
-    Main function calling all core steps of the pipeline.
+    Main function calling all core steps of the pipeline, asking for the flux
+    ordering, data - residual figures, range of files, flush and column format.
+    The answers replace those options; every other one (variants, delimiter,
+    dpi, jobs, tracing, ...) comes from the command line / TOML as in cli.run
     """
+    # Imported here: the headless run imports them only for the steps it runs
+    # pylint: disable=import-outside-toplevel
+    from bhowmik2025_et_al_plots import images_latex
+    from bhowmik2025_et_al_plots import renderer
+    from bhowmik2025_et_al_plots import table_creator
+
     paths.log_paths()
-    table_creator.creating_tables(verbose=False)
+    table_creator.creating_tables(verbose=False, skip_unchanged=options.incremental)
 
-    # if flush:
-    #     logging.warning("Flush mode enabled. Deleting content in %s", paths.output_dir)
     flush = (
         input(
             "⚠️  Type 'y' or 'yes' to delete all folders inside 'outputs'. Anything else will cancel:\n"
@@ -71,64 +76,43 @@ def main(reverse: bool = True) -> None:
         .lower()
     )
     if flush in ["y", "yes"]:
-        logger.warning("Flush mode enabled. Deleting content in %s", paths.output_dir)
-        for name in os.listdir(paths.output_dir):
-            full_path = os.path.join(paths.output_dir, name)
-            if os.path.isdir(full_path):
-                shutil.rmtree(full_path)
-                # print("\nDeleted folder: %s", full_path)
-                logger.info("Deleted folder: %s", full_path)
+        cli.flush_outputs()
     else:
         # print("Flush aborted by user. No folders deleted.")
         # print(50 * "#")
         logger.info("Flush aborted by user. No folders deleted.")
         # print(50 * "#")
-    # singlecolumn = (
-    #     input(
-    #         "⚠️  Type 'y' or 'yes' use single collumn format on your grids. Anything else will cancel:\n"
-    #     )
-    #     .strip()
-    #     .lower()
-    # )
-    # if singlecolumn in ["y", "yes"]:
-    #     doublecol = False
-    #     logger.info("Single column format enabled for LaTeX grids.")
-    # else:
-    #     doublecol = True
-    #     logger.info("Double column format enabled for LaTeX grids.")
-
-    cfg =    plotter_w_decorators_w_residuals.load_variables(
-        verbose=False,
-        _zoom_factor=1,
-        smooth=True,
-        flux_ordered=True,
-        dpi_png=100,
-        dpi_pdf=600,
-        data_res=None,
+
+    answers = renderer.ask_plot_options()
+    options = dataclasses.replace(
+        options,
+        flux_ordered=answers["flux_ordered"],
+        data_res=answers["data_res"],
+        start=answers["first_file"],
+        end=answers["last_file"],
     )
-    # plotter_w_decorators_w_residuals.load_variables(        verbose=False,        _zoom_factor=1,
-    #     smooth=False,
-    #     flux_ordered=None,
-    #     dpi_png=100,
-    #     dpi_pdf=600,
-    #     data_res=None,
-    # # )
-    #
-    # plotter_w_decorators.plotter(cfg)
-    plotter_w_decorators_w_residuals.plotter(cfg)
-
-    if cfg.flux_ordered:
-        reverse = True
-    cfg_latex = images_latex.load_variables_grid(reverse=reverse, data_res=cfg.data_res)
+    cli.make_figures(options)
 
+    cfg_latex = images_latex.load_variables_grid(
+        reverse=options.reverse, data_res=options.data_res
+    )
     images_latex.generate_all_latex_figures(cfg=cfg_latex)
-    if cfg.data_res:
-        images_latex.generate_all_latex_figures(cfg=cfg_latex)
-        # images_latex.generate_all_latex_data_residual_figures(cfg=cfg_latex)
+
+
+def main(argv=None) -> None:
+    """
+    Main function calling all core steps of the pipeline, headless unless
+    --interactive is given
+    """
+    options = cli.parse_options(argv)
+    if options.interactive:
+        interactive_main(options)
+    else:
+        cli.run(options)
 
 
 if __name__ == "__main__":
     # print(50 * "#")
     logger.info("You are rewriting tables and outputs by running the main function.")
     # print(50 * "#")
-    main(reverse=True)
+    main()
@@ -0,0 +1,31 @@
+"""
+Synthetic inputs and benchmark suite of the pipeline, runnable without the
+private input_files (see synthetic.py and suite.py).
+The names below are imported from their submodule on first use: importing
+them here would load synthetic before `python -m ...bench.synthetic` runs it
+(runpy warns about it).
+"""
+
+import importlib
+
+# Name: submodule defining it
+_EXPORTS = {
+    "SyntheticSample": "synthetic",
+    "generate_inputs": "synthetic",
+    "compare": "suite",
+    "run_benchmark": "suite",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_EXPORTS))
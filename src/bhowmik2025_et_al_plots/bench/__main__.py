@@ -0,0 +1,82 @@
+"""
+Command line of the benchmark suite (see suite.py)
+
+    python -m bhowmik2025_et_al_plots.bench --disks 6 --size 256 --repeat 3
+    python -m bhowmik2025_et_al_plots.bench --save-baseline
+"""
+
+import argparse
+import logging
+import sys
+
+from .suite import (
+    BASELINE_FILE,
+    DEFAULT_THRESHOLD,
+    compare,
+    load_baseline,
+    report,
+    run_benchmark,
+    save_baseline,
+)
+from .synthetic import SyntheticSample
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bhowmik2025_et_al_plots.bench",
+        description="Time every stage of the pipeline on a synthetic sample",
+    )
+    parser.add_argument("--disks", type=int, default=SyntheticSample.n_disks)
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=SyntheticSample.image_size,
+        help="pixels of the band 8 images",
+    )
+    parser.add_argument("--model-size", type=int, default=SyntheticSample.model_size)
+    parser.add_argument("--seed", type=int, default=SyntheticSample.seed)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--root",
+        help="keep the synthetic inputs and outputs here (default: a temporary "
+        "directory)",
+    )
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="slowdown from the baseline counted as a regression (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these timings as the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sample = SyntheticSample(
+        n_disks=args.disks,
+        image_size=args.size,
+        model_size=args.model_size,
+        seed=args.seed,
+    )
+    timings = run_benchmark(sample, repeat=args.repeat, root=args.root)
+    if args.save_baseline:
+        save_baseline(args.baseline, sample, timings)
+        print(report(timings))
+        print(f"Baseline saved in {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline, sample)
+    print(report(timings, baseline))
+    regressions = compare(timings, baseline or {}, args.threshold)
+    if regressions:
+        print(f"Regressions (> {100 * args.threshold:.0f}%): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
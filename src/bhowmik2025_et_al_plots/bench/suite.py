@@ -0,0 +1,184 @@
+"""
+Benchmark of every stage of the pipeline on a synthetic sample (see
+synthetic.py), so a change can be measured without the private input_files.
+The stages are timed in order, each one repeat times (the median is kept):
+- tables: table_creator.creating_tables
+- config: renderer.build_config (the load_variables of the batch runs)
+- render: renderer.plot_disk of every disk, per disk
+- preview: the same with the preview engine (no matplotlib), per disk
+- encode_<variant>_<fmt>: savefig of the template of each variant, per format
+- latex: images_latex.generate_all_latex_figures
+The timings are compared with a stored baseline (baseline.json, made with
+--save-baseline on the same sample) and a stage slower than the baseline by
+more than the threshold is a regression (exit status 1).
+
+    python -m bhowmik2025_et_al_plots.bench --disks 6 --size 256 --repeat 3
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import platform
+import statistics
+import tempfile
+import time
+from dataclasses import asdict
+
+from bhowmik2025_et_al_plots.utils.paths import ROOT_ENV
+
+from .synthetic import SyntheticSample, generate_inputs
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+# A stage slower than its baseline by more than this fraction is a regression
+DEFAULT_THRESHOLD = 0.25
+# Stages faster than this (s) are too noisy to be compared
+MIN_COMPARED = 0.005
+
+
+def timed(func, *args, **kwargs) -> tuple:
+    """(seconds, result) of func(*args, **kwargs)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run_stages(root: str, repeat: int = 3) -> dict:
+    """
+    Median time (s) of every stage on the synthetic inputs of root (the
+    PathUtils of the pipeline follow ROOT_ENV)
+    """
+    os.environ[ROOT_ENV] = root
+    # pylint: disable=import-outside-toplevel
+    from bhowmik2025_et_al_plots import images_latex, renderer, table_creator
+    from bhowmik2025_et_al_plots.utils import close_bundles, get_template
+    from bhowmik2025_et_al_plots.utils.figure_writer import encode_figure
+
+    samples: dict = {}
+
+    def add(stage: str, seconds: float) -> None:
+        samples.setdefault(stage, []).append(seconds)
+
+    for _ in range(repeat):
+        add("tables", timed(table_creator.creating_tables, skip_unchanged=False)[0])
+        seconds, cfg = timed(
+            renderer.build_config,
+            flux_ordered=True,
+            smooth=True,
+            variants=tuple(renderer.VARIANTS),
+            incremental=False,
+            # Every write inside the time of its disk, as in the baseline
+            writer_threads=0,
+        )
+        add("config", seconds)
+
+        rows = list(cfg.subset.itertuples(index=False))
+        seconds = sum(
+            timed(renderer.plot_disk, cfg, count, row)[0]
+            for count, row in enumerate(rows)
+        )
+        add("render", seconds / max(len(rows), 1))
+        preview_cfg = dataclasses.replace(cfg, preview=True)
+        seconds = sum(
+            timed(renderer.plot_disk, preview_cfg, count, row)[0]
+            for count, row in enumerate(rows)
+        )
+        add("preview", seconds / max(len(rows), 1))
+
+        # Templates are left with the last disk drawn
+        for variant, _ in renderer.saved_variants(cfg):
+            fig = get_template(variant.name, variant.builder).fig
+            for fmt, dpi in (("pdf", cfg.dpi), ("png", 100)):
+                add(
+                    f"encode_{variant.name}_{fmt}",
+                    timed(encode_figure, fig, fmt, dpi)[0],
+                )
+        close_bundles()
+
+        add(
+            "latex",
+            timed(
+                images_latex.generate_all_latex_figures,
+                images_latex.GridConfig(
+                    reverse=True, doublecolumns=True, data_res=True
+                ),
+            )[0],
+        )
+
+    return {stage: statistics.median(times) for stage, times in samples.items()}
+
+
+def compare(timings: dict, baseline: dict, threshold: float) -> list:
+    """Stages of timings slower than baseline by more than threshold"""
+    regressions = []
+    missing = [stage for stage in timings if stage not in baseline]
+    if baseline and missing:
+        logger.warning(
+            "No baseline for %s, not compared (update it with --save-baseline)",
+            ", ".join(missing),
+        )
+    for stage, seconds in timings.items():
+        reference = baseline.get(stage)
+        if reference is None or reference < MIN_COMPARED:
+            continue
+        if seconds > reference * (1 + threshold):
+            regressions.append(stage)
+    return regressions
+
+
+def report(timings: dict, baseline: dict = None) -> str:
+    """Table of timings, with the change from baseline"""
+    lines = [f"{'stage':<32}{'time (s)':>12}{'baseline':>12}{'change':>10}"]
+    for stage, seconds in timings.items():
+        reference = (baseline or {}).get(stage)
+        if reference:
+            change = f"{100 * (seconds / reference - 1):+.1f}%"
+            lines.append(f"{stage:<32}{seconds:>12.4f}{reference:>12.4f}{change:>10}")
+        else:
+            lines.append(f"{stage:<32}{seconds:>12.4f}{'-':>12}{'-':>10}")
+    return "\n".join(lines)
+
+
+def load_baseline(path: str, sample: SyntheticSample) -> dict:
+    """Timings of the baseline of path, if it was made with the same sample"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        stored = json.load(f)
+    if stored.get("sample") != asdict(sample):
+        logger.warning("The baseline in %s is of another sample, not compared", path)
+        return None
+    return stored["timings"]
+
+
+def save_baseline(path: str, sample: SyntheticSample, timings: dict) -> None:
+    """Write timings as the baseline of sample"""
+    content = {
+        "sample": asdict(sample),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timings": {stage: round(seconds, 6) for stage, seconds in timings.items()},
+    }
+    with open(path, mode="w", encoding="utf-8") as f:
+        json.dump(content, f, indent=2)
+        f.write("\n")
+
+
+def run_benchmark(
+    sample: SyntheticSample = SyntheticSample(),
+    repeat: int = 3,
+    root: str = None,
+) -> dict:
+    """
+    Generate sample under root (a temporary directory if None) and time it
+    """
+    if root is not None:
+        generate_inputs(root, sample)
+        return run_stages(root, repeat)
+    with tempfile.TemporaryDirectory(prefix="bhowmik2025_bench_") as tmp_root:
+        generate_inputs(tmp_root, sample)
+        return run_stages(tmp_root, repeat)
@@ -0,0 +1,271 @@
+"""
+Synthetic ALMA-like inputs, with the layout and conventions of input_files
+(the real ones are not public), so the pipeline can be run and timed anywhere.
+For every disk it writes:
+- fits_files/<name>_all_p0_bigmask.fits: band 8 image (FK5), a ringed disk of
+  random inclination and position angle, convolved with the beam, plus noise;
+- fits_files/<name>_frank_model.fits: the frank model of the disk (ICRS);
+- spec_avg_data_residual/<name>_data.fits / _residual.fits: the image on a 2x
+  coarser grid and what is left after subtracting the model (ICRS);
+- frank_profiles/<name>_frank_profile_fit.txt: r (arcsec), I, err columns;
+and the table.csv / gap_ring_infl_pt.csv rows of the disk. Every image is
+centred on the position written in table.csv (FK5), transformed to ICRS for the
+ICRS ones as the pipeline does, so the disk is at the centre of all of them.
+
+    python -m bhowmik2025_et_al_plots.bench.synthetic /tmp/sample --disks 30
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from astropy import units as u
+from astropy.coordinates import SkyCoord
+from astropy.io import fits
+from scipy.ndimage import gaussian_filter
+
+# Pixel size of the band 8 images, in arcsec
+DATA_PIXEL_ARCSEC = 0.01
+# Noise of the band 8 images, in Jy / beam
+NOISE_JY = 2e-5
+# Field of the sample (around rho Oph), in deg
+FIELD_RA_DEG = 247.0
+FIELD_DEC_DEG = -24.5
+STAGES = (0, 1, 2, 3)
+CLASSES = ("I", "F", "II")
+
+
+@dataclass
+class SyntheticSample:
+    """Size of a synthetic sample"""
+
+    n_disks: int = 6
+    image_size: int = 256  # pixels of the band 8 images (avg_data: half)
+    model_size: int = 256  # pixels of the frank models
+    profile_points: int = 300
+    seed: int = 0
+
+
+def disk_name(k: int) -> str:
+    """Field of disk k, cycling through the naming schemes of the sample"""
+    kind = k % 3
+    if kind == 0:
+        return f"ISO-Oph_{k + 1}"
+    if kind == 1:
+        return f"ODISEA_C4_{k + 1:03d}"
+    return f"RA{162800 + k:06d}.74"
+
+
+def image_header(
+    size: int, pixel_arcsec: float, ra_deg: float, dec_deg: float, radesys: str
+) -> fits.Header:
+    """Header of a size x size image centred on (ra_deg, dec_deg)"""
+    header = fits.Header()
+    header["BUNIT"] = "Jy/beam"
+    header["CTYPE1"] = "RA---SIN"
+    header["CTYPE2"] = "DEC--SIN"
+    header["CRVAL1"] = ra_deg
+    header["CRVAL2"] = dec_deg
+    header["CRPIX1"] = size / 2 + 1
+    header["CRPIX2"] = size / 2 + 1
+    header["CDELT1"] = -pixel_arcsec / 3600
+    header["CDELT2"] = pixel_arcsec / 3600
+    header["CUNIT1"] = "deg"
+    header["CUNIT2"] = "deg"
+    header["RADESYS"] = radesys
+    header["EQUINOX"] = 2000.0
+    return header
+
+
+def icrs_position(ra_deg: float, dec_deg: float) -> tuple:
+    """(ra, dec) in ICRS, in deg, of the FK5 J2000 position (ra_deg, dec_deg)"""
+    coord = SkyCoord(ra_deg * u.deg, dec_deg * u.deg, frame="fk5", equinox="J2000")
+    return coord.icrs.ra.deg, coord.icrs.dec.deg
+
+
+def table_position(ra_deg: float, dec_deg: float) -> tuple:
+    """
+    (ra_deg, dec_deg) rounded to what table.csv holds (0.01 s of right
+    ascension, 0.1 arcsec of declination), so the images are centred on the
+    position the pipeline reads
+    """
+    return round(ra_deg * 24000) / 24000, round(dec_deg * 36000) / 36000
+
+
+def sexagesimal(ra_deg: float, dec_deg: float) -> tuple:
+    """
+    center_x / center_y of table.csv: "hh:mm:ss:cc" and "-dd.mm.ss.s"
+    (table_creator turns them into hh:mm:ss.cc and -dd:mm:ss.s)
+    """
+    centiseconds = round(ra_deg * 24000)
+    hh, mm = centiseconds // 360000, centiseconds // 6000 % 60
+    ss, cc = centiseconds // 100 % 60, centiseconds % 100
+    center_x = f"{hh:02d}:{mm:02d}:{ss:02d}:{cc:02d}"
+
+    sign = "-" if dec_deg < 0 else ""
+    deciarcsec = round(abs(dec_deg) * 36000)
+    dd, dm, ds = deciarcsec // 36000, deciarcsec // 600 % 60, deciarcsec % 600 / 10
+    center_y = f"{sign}{dd:02d}.{dm:02d}.{ds:04.1f}"
+    return center_x, center_y
+
+
+def radial_profile(r_arcsec, core: float, rings: list) -> np.ndarray:
+    """Gaussian core plus gaussian rings [(radius, width, amplitude), ...]"""
+    intensity = np.exp(-0.5 * (r_arcsec / core) ** 2)
+    for radius, width, amplitude in rings:
+        intensity += amplitude * np.exp(-0.5 * ((r_arcsec - radius) / width) ** 2)
+    return intensity
+
+
+def sky_radius(size: int, pixel_arcsec: float, inc: float, pa: float) -> np.ndarray:
+    """Deprojected radius (arcsec) of every pixel of a disk centred on the image"""
+    yy, xx = (np.indices((size, size)) - size / 2) * pixel_arcsec
+    cos_pa, sin_pa = np.cos(pa), np.sin(pa)
+    major = xx * sin_pa + yy * cos_pa
+    minor = (xx * cos_pa - yy * sin_pa) / np.cos(inc)
+    return np.hypot(major, minor)
+
+
+def generate_inputs(root: str, sample: SyntheticSample = SyntheticSample()) -> str:
+    """
+    Write the input_files of sample under root (the root of a PathUtils) and
+    return the input directory
+    """
+    rng = np.random.default_rng(sample.seed)
+    input_dir = os.path.join(root, "input_files")
+    fits_dir = os.path.join(input_dir, "fits_files")
+    data_res_dir = os.path.join(fits_dir, "spec_avg_data_residual")
+    profile_dir = os.path.join(input_dir, "frank_profiles")
+    for directory in (fits_dir, data_res_dir, profile_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    size = sample.image_size
+    image_radius = size / 2 * DATA_PIXEL_ARCSEC
+    rows, features = [], []
+    for k in range(sample.n_disks):
+        name = disk_name(k)
+        ra_deg, dec_deg = table_position(
+            FIELD_RA_DEG + rng.uniform(-0.5, 0.5),
+            FIELD_DEC_DEG + rng.uniform(-0.5, 0.5),
+        )
+        distance = rng.uniform(120, 160)  # pc
+        beam_maj = rng.uniform(0.04, 0.08)  # arcsec
+        beam_min = beam_maj * rng.uniform(0.7, 1.0)
+        beam_pa = rng.uniform(-90, 90)
+        inc, pa = np.radians(rng.uniform(0, 70)), np.radians(rng.uniform(0, 180))
+
+        # Disk, rings and gaps, in arcsec
+        outer = image_radius * rng.uniform(0.2, 0.45)
+        core = outer * rng.uniform(0.1, 0.3)
+        n_rings = rng.integers(0, 4)
+        radii = np.sort(rng.uniform(1.5 * core, outer, n_rings))
+        rings = [(r, outer * 0.05, rng.uniform(0.1, 0.6)) for r in radii]
+        peak = rng.uniform(2e-3, 5e-2)  # Jy / beam
+
+        # Band 8 image, convolved with the beam
+        sigma_pix = beam_maj / DATA_PIXEL_ARCSEC / 2.3548
+        sky = radial_profile(sky_radius(size, DATA_PIXEL_ARCSEC, inc, pa), core, rings)
+        data = peak * gaussian_filter(sky, sigma_pix) + rng.normal(
+            0, NOISE_JY, (size, size)
+        )
+        header = image_header(size, DATA_PIXEL_ARCSEC, ra_deg, dec_deg, "FK5")
+        header["BMAJ"] = beam_maj / 3600
+        header["BMIN"] = beam_min / 3600
+        header["BPA"] = beam_pa
+        fits.PrimaryHDU(data.astype("f4"), header).writeto(
+            os.path.join(fits_dir, f"{name}_all_p0_bigmask.fits"), overwrite=True
+        )
+
+        # frank model, over the same field
+        icrs_ra, icrs_dec = icrs_position(ra_deg, dec_deg)
+        model_pixel = 2 * image_radius / sample.model_size
+        model = peak * radial_profile(
+            sky_radius(sample.model_size, model_pixel, inc, pa), core, rings
+        )
+        fits.PrimaryHDU(
+            model.astype("f8"),
+            image_header(sample.model_size, model_pixel, icrs_ra, icrs_dec, "ICRS"),
+        ).writeto(os.path.join(fits_dir, f"{name}_frank_model.fits"), overwrite=True)
+
+        # Image and residual on the 2x coarser grid of spec_avg_data
+        avg_data = data.reshape(size // 2, 2, size // 2, 2).mean(axis=(1, 3))
+        avg_model = peak * gaussian_filter(sky, sigma_pix)
+        avg_model = avg_model.reshape(size // 2, 2, size // 2, 2).mean(axis=(1, 3))
+        avg_header = image_header(
+            size // 2, 2 * DATA_PIXEL_ARCSEC, icrs_ra, icrs_dec, "ICRS"
+        )
+        for suffix, image in (("data", avg_data), ("residual", avg_data - avg_model)):
+            fits.PrimaryHDU(image.astype("f4"), avg_header).writeto(
+                os.path.join(data_res_dir, f"{name}_{suffix}.fits"), overwrite=True
+            )
+
+        # frank profile, in Jy / sr like the real fits
+        r_profile = np.linspace(0, image_radius, sample.profile_points)
+        intensity = 1e10 * peak * radial_profile(r_profile, core, rings)
+        error = 0.02 * intensity.max() * np.ones_like(r_profile)
+        np.savetxt(
+            os.path.join(profile_dir, f"{name}_frank_profile_fit.txt"),
+            np.column_stack((r_profile, intensity, error)),
+        )
+
+        center_x, center_y = sexagesimal(ra_deg, dec_deg)
+        rows.append(
+            {
+                "id": k,
+                "field": name,
+                "center_x": center_x,
+                "center_y": center_y,
+                "beam_pa": beam_pa,
+                "beam_maj": beam_maj,
+                "beam_min": beam_min,
+                "Distance": distance,
+                "B8_Flux": peak * 1e3 * rng.uniform(5, 20),  # mJy
+                "isbinary": int(rng.uniform() < 0.1),
+                "R_zoom": min(1.3 * outer, image_radius * 0.9),
+                "rms_data": NOISE_JY,
+                "Rmax_frank": image_radius,
+                "Stage": STAGES[k % len(STAGES)],
+                "Class": CLASSES[k % len(CLASSES)],
+            }
+        )
+        # Bright rings, the gaps inside them and the edge of the disk, in au
+        au = distance
+        number = 1
+        for radius, _, _ in rings:
+            gap = radius - outer * 0.1
+            features.append({"Target": name, "D/B": f"D-{number}", "R": gap * au})
+            features.append({"Target": name, "D/B": f"B-{number}", "R": radius * au})
+            number += 1
+        features.append({"Target": name, "D/B": f"I-{number}", "R": outer * au})
+
+    pd.DataFrame(rows).to_csv(os.path.join(input_dir, "table.csv"), index=False)
+    pd.DataFrame(features, columns=["Target", "D/B", "R"]).to_csv(
+        os.path.join(input_dir, "gap_ring_infl_pt.csv"), index=False
+    )
+    return input_dir
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("root", help="root of the synthetic tree (input_files)")
+    parser.add_argument("--disks", type=int, default=SyntheticSample.n_disks)
+    parser.add_argument("--size", type=int, default=SyntheticSample.image_size)
+    parser.add_argument("--model-size", type=int, default=SyntheticSample.model_size)
+    parser.add_argument("--seed", type=int, default=SyntheticSample.seed)
+    args = parser.parse_args(argv)
+    input_dir = generate_inputs(
+        args.root,
+        SyntheticSample(
+            n_disks=args.disks,
+            image_size=args.size,
+            model_size=args.model_size,
+            seed=args.seed,
+        ),
+    )
+    print(f"Synthetic inputs written in {input_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""
+Non-interactive command line of the whole pipeline (tables, figures and LaTeX
+grids), for batch jobs on a cluster. Every option the prompts used to ask for
+(flux ordering, data - residual figures, start / end index, column format,
+flushing the outputs) and the ones that were hard-coded (delimiter, dpi, zoom,
+figure variants, number of worker processes) are read from a TOML file and/or
+the command line, in this order of precedence: command line > TOML > defaults.
+The prompts are still there with --interactive (see __main__.py).
+
+    python -m bhowmik2025_et_al_plots --config run.toml --jobs 8 --end 50
+
+A run can be split in N shards by global flux rank (see utils.sharding), e.g.
+in a job array, after building the tables once (with the profile store and
+image statistics, which the shards only read):
+
+    python -m bhowmik2025_et_al_plots --config run.toml --shard $TASK_ID/N
+    python -m bhowmik2025_et_al_plots --config run.toml --merge N
+
+--local-shards N does the same with N processes on this machine, bringing the
+profile store and image statistics up to date before starting them.
+
+The TOML keys are the fields of RunOptions, at the top level or in any table:
+
+    [plot]
+    flux_ordered = true
+    variants = ["cutout_residual", "data_res_model"]
+    dpi_pdf = 600
+    [latex]
+    doublecolumns = false
+
+The steps import their modules when they run (renderer with matplotlib,
+astropy and scipy only to plot), so --help, the tables or the LaTeX grids
+start right away.
+"""
+
+import argparse
+import dataclasses
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tomllib
+from dataclasses import dataclass, fields
+
+from bhowmik2025_et_al_plots.utils import PathUtils, parse_disk_range, parse_shard
+
+logger = logging.getLogger(__name__)
+paths = PathUtils()
+
+
+@dataclass
+class RunOptions:
+    """Every option of a run of the pipeline, defaults of __main__"""
+
+    # Steps
+    tables: bool = True
+    flush: bool = False
+    plot: bool = True
+    latex: bool = True
+    interactive: bool = False
+    # Sharding (see utils.sharding)
+    shard: tuple = None
+    merge: int = None
+    local_shards: int = None
+    # Figures (see renderer.build_config)
+    verbose: bool = False
+    smooth: bool = True
+    zoom_factor: int = 1
+    flux_ordered: bool = True
+    dpi_pdf: int = 600
+    dpi_png: int = 100
+    data_res: bool = True
+    start: int = 0
+    end: int = None
+    delimiter: int = 101
+    variants: tuple = ("cutout_residual", "data_res_model")
+    preview: bool = False
+    raster_dpi: int = None
+    max_bytes: int = None
+    jobs: int = 1
+    tasks_per_worker: int = 10
+    writer_threads: int = 2
+    read_ahead: int = 2
+    incremental: bool = True
+    # Instrumentation (see utils.tracing)
+    trace: bool = False
+    profile_disks: tuple = None
+    memory: bool = False
+    # LaTeX grids (see images_latex.GridConfig)
+    doublecolumns: bool = True
+    reverse: bool = True
+
+
+OPTION_NAMES = {field.name for field in fields(RunOptions)}
+
+
+def read_config(path: str) -> dict:
+    """
+    RunOptions fields given in the TOML file path, from its top level and
+    from its tables (e.g. [plot], [latex])
+    """
+    with open(path, mode="rb") as f:
+        content = tomllib.load(f)
+
+    options: dict = {}
+    for key, value in content.items():
+        items = value.items() if isinstance(value, dict) else [(key, value)]
+        for name, option in items:
+            if name not in OPTION_NAMES:
+                raise ValueError(f"Unknown option {name!r} in {path}")
+            if name == "shard":
+                option = parse_shard(option)
+            if name == "profile_disks" and isinstance(option, str):
+                option = parse_disk_range(option)
+            options[name] = tuple(option) if isinstance(option, list) else option
+    return options
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options; the ones not given are None (kept from TOML)"""
+    parser = argparse.ArgumentParser(
+        prog="bhowmik2025_et_al_plots",
+        description="Tables, figures and LaTeX grids of the disks, without prompts",
+    )
+    parser.add_argument("--config", help="TOML file with the options of the run")
+    parser.add_argument(
+        "--interactive",
+        action="store_true",
+        default=None,
+        help="ask for the flux ordering, data - residual, range, flush and "
+        "column format as the pipeline always did",
+    )
+
+    steps = parser.add_argument_group("steps")
+    for name, what in (
+        ("tables", "rebuild full_table.csv"),
+        ("flush", "delete every folder inside outputs first"),
+        ("plot", "make the figures"),
+        ("latex", "write the LaTeX grids"),
+    ):
+        steps.add_argument(
+            f"--{name}", action=argparse.BooleanOptionalAction, help=what
+        )
+
+    shards = parser.add_argument_group("shards")
+    shards.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="i/N: only plot shard i (0-based) of N, nothing else",
+    )
+    shards.add_argument(
+        "--merge",
+        type=int,
+        metavar="N",
+        help="check that the N shards are complete, merge them and write the "
+        "LaTeX grids",
+    )
+    shards.add_argument(
+        "--local-shards",
+        type=int,
+        metavar="N",
+        help="plot in N shards, each one a process on this machine",
+    )
+
+    figures = parser.add_argument_group("figures")
+    figures.add_argument("--verbose", action=argparse.BooleanOptionalAction)
+    figures.add_argument(
+        "--smooth",
+        action=argparse.BooleanOptionalAction,
+        help="smooth the Stage 0/1 disks",
+    )
+    figures.add_argument(
+        "--flux-ordered",
+        action=argparse.BooleanOptionalAction,
+        help="sort by B8_Flux and save numbered pdfs (--no-flux-ordered: pngs)",
+    )
+    figures.add_argument(
+        "--data-res",
+        action=argparse.BooleanOptionalAction,
+        help="also save the data - residual figures",
+    )
+    figures.add_argument("--zoom-factor", type=int)
+    figures.add_argument("--dpi-pdf", type=int)
+    figures.add_argument("--dpi-png", type=int)
+    figures.add_argument("--start", type=int, help="first row of full_table")
+    figures.add_argument("--end", type=int, help="last row (excluded)")
+    figures.add_argument(
+        "--delimiter", type=int, help="at most delimiter + 1 disks are plotted"
+    )
+    figures.add_argument(
+        "--variants",
+        type=lambda value: tuple(value.split(",")),
+        help="comma separated figures of renderer.VARIANTS (cutout, "
+        "cutout_residual, data_res, data_res_model)",
+    )
+    figures.add_argument(
+        "--preview",
+        action=argparse.BooleanOptionalAction,
+        help="quick-look pngs without matplotlib, in outputs/preview",
+    )
+    figures.add_argument(
+        "--raster-dpi",
+        type=int,
+        help="rasterize the image layers and shaded bands of the pdfs at this "
+        "resolution, text and lines stay vectors",
+    )
+    figures.add_argument(
+        "--max-bytes",
+        type=int,
+        help="budget of every figure, larger ones get lower resolution rasters",
+    )
+    figures.add_argument("--jobs", type=int, help="worker processes")
+    figures.add_argument("--tasks-per-worker", type=int)
+    figures.add_argument(
+        "--writer-threads",
+        type=int,
+        help="threads writing the figures while the next ones are drawn "
+        "(0: wait for every write)",
+    )
+    figures.add_argument(
+        "--read-ahead",
+        type=int,
+        metavar="K",
+        help="read the inputs of the next K disks while one is drawn "
+        "(without --jobs)",
+    )
+    figures.add_argument(
+        "--incremental",
+        action=argparse.BooleanOptionalAction,
+        help="skip the disks whose figures are up to date (and full_table.csv "
+        "if no input file changed)",
+    )
+
+    instrumentation = parser.add_argument_group("instrumentation")
+    instrumentation.add_argument(
+        "--trace",
+        action=argparse.BooleanOptionalAction,
+        help="time every stage of every disk, spans exported to outputs/trace",
+    )
+    instrumentation.add_argument(
+        "--profile-disks",
+        type=parse_disk_range,
+        metavar="FIRST:LAST",
+        help="run the disks of global rank in [FIRST, LAST) under cProfile",
+    )
+    instrumentation.add_argument(
+        "--memory",
+        action=argparse.BooleanOptionalAction,
+        help="trace the Python allocations of every disk (tracemalloc, slower)",
+    )
+
+    latex = parser.add_argument_group("LaTeX grids")
+    latex.add_argument("--doublecolumns", action=argparse.BooleanOptionalAction)
+    latex.add_argument(
+        "--reverse",
+        action=argparse.BooleanOptionalAction,
+        help="decreasing flux order",
+    )
+    return parser
+
+
+def parse_options(argv=None) -> RunOptions:
+    """RunOptions of the command line argv (sys.argv if None) and its --config"""
+    args = vars(build_parser().parse_args(argv))
+    options = read_config(args.pop("config")) if args.get("config") else {}
+    options.update({name: value for name, value in args.items() if value is not None})
+    return RunOptions(**options)
+
+
+def flush_outputs() -> None:
+    """Delete every folder inside the outputs directory"""
+    logger.warning("Flush mode enabled. Deleting content in %s", paths.output_dir)
+    for name in os.listdir(paths.output_dir):
+        full_path = os.path.join(paths.output_dir, name)
+        if os.path.isdir(full_path):
+            shutil.rmtree(full_path)
+            logger.info("Deleted folder: %s", full_path)
+
+
+def shard_args(options: RunOptions, shard: tuple) -> list:
+    """Command line of the process plotting shard of the run of options"""
+    args = ["--shard", "{}/{}".format(*shard)]
+    skipped = {"shard", "merge", "local_shards", "interactive"}
+    for field in fields(RunOptions):
+        value = getattr(options, field.name)
+        flag = field.name.replace("_", "-")
+        if field.name in skipped or value is None:
+            continue
+        if isinstance(value, bool):
+            args.append(f"--{flag}" if value else f"--no-{flag}")
+        elif isinstance(value, tuple):
+            args += [f"--{flag}", ",".join(str(item) for item in value)]
+        else:
+            args += [f"--{flag}", str(value)]
+    return args
+
+
+def run_local_shards(options: RunOptions) -> None:
+    """
+    Local stand-in for the scheduler of a job array: plot the shards of
+    options.local_shards, each one in its own process, all at the same time.
+    The profile store and image statistics of the run are brought up to date
+    here first, once; the shards only read them
+    """
+    count = options.local_shards
+    plot_config(dataclasses.replace(options, shard=None))
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "bhowmik2025_et_al_plots.cli",
+                *shard_args(options, (index, count)),
+            ]
+        )
+        for index in range(count)
+    ]
+    failed = [index for index, process in enumerate(processes) if process.wait()]
+    if failed:
+        raise RuntimeError(f"Shards {failed} of {count} failed")
+
+
+def plot_config(options: RunOptions):
+    """renderer.PlotConfig of options, without prompts"""
+    from bhowmik2025_et_al_plots import renderer
+
+    return renderer.build_config(
+        verbose=options.verbose,
+        smooth=options.smooth,
+        zoom_factor=options.zoom_factor,
+        flux_ordered=options.flux_ordered,
+        dpi_pdf=options.dpi_pdf,
+        dpi_png=options.dpi_png,
+        data_res=options.data_res,
+        first_file=options.start,
+        last_file=options.end,
+        delimiter=options.delimiter,
+        variants=options.variants,
+        preview=options.preview,
+        raster_dpi=options.raster_dpi,
+        max_bytes=options.max_bytes,
+        shard=options.shard,
+        jobs=options.jobs,
+        tasks_per_worker=options.tasks_per_worker,
+        writer_threads=options.writer_threads,
+        read_ahead=options.read_ahead,
+        incremental=options.incremental,
+        trace=options.trace,
+        profile_disks=options.profile_disks,
+        memory=options.memory,
+    )
+
+
+def write_latex(options: RunOptions, data_res: bool) -> None:
+    """LaTeX grids of the figures in the outputs directory"""
+    from bhowmik2025_et_al_plots import images_latex
+
+    images_latex.generate_all_latex_figures(
+        images_latex.GridConfig(
+            reverse=options.reverse,
+            doublecolumns=options.doublecolumns,
+            data_res=data_res,
+        )
+    )
+
+
+def plot_figures(options: RunOptions) -> None:
+    """Figures of options (of its shard, if any)"""
+    from bhowmik2025_et_al_plots import renderer
+
+    renderer.plotter(plot_config(options))
+
+
+def make_figures(options: RunOptions) -> None:
+    """Figures of options, in options.local_shards processes if given"""
+    if options.local_shards:
+        run_local_shards(options)
+        merge_figures(options, options.local_shards)
+    else:
+        plot_figures(options)
+
+
+def merge_figures(options: RunOptions, count: int) -> None:
+    """Check and merge the manifests of the count shards of options"""
+    from bhowmik2025_et_al_plots import renderer
+
+    renderer.merge_shards(plot_config(options), count)
+
+
+def run(options: RunOptions) -> None:
+    """Run the steps of options, without any prompt"""
+    logger.info(
+        "Running with %s",
+        ", ".join(f"{k}={v}" for k, v in dataclasses.asdict(options).items()),
+    )
+    paths.log_paths()
+    if options.shard is not None:
+        # Tables, flush and LaTeX grids are done once for the whole run,
+        # before the shards and by --merge
+        plot_figures(options)
+        return
+    if options.merge is not None:
+        merge_figures(options, options.merge)
+        if options.latex:
+            write_latex(options, data_res=options.data_res)
+        return
+
+    if options.tables:
+        from bhowmik2025_et_al_plots import table_creator
+
+        table_creator.creating_tables(
+            verbose=options.verbose, skip_unchanged=options.incremental
+        )
+    if options.flush:
+        flush_outputs()
+    if options.plot:
+        make_figures(options)
+    if options.latex:
+        write_latex(options, data_res=options.data_res)
+
+
+def main(argv=None) -> None:
+    """Entry point of the headless run"""
+    run(parse_options(argv))
+
+
+if __name__ == "__main__":
+    # Shard processes of run_local_shards log to the terminal only
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[{asctime} {process}]: {message}",
+        style="{",
+        datefmt="%H:%M:%S",
+    )
+    main()
@@ -1,32 +1,57 @@
 import os
+import sys
 import shutil
 import logging
 from dataclasses import dataclass
-import pandas as pd
 
 from bhowmik2025_et_al_plots.utils import PathUtils
 
 logger = logging.getLogger(__name__)
 paths = PathUtils()
 
-full_table = pd.read_csv(f"{paths.input_dir}/full_table.csv", index_col=False)
 
-pdf_dir = os.path.join(paths.output_dir, "pdf")
-data_res_dir = os.path.join(paths.output_dir, "avg_data_residual")
-groups = full_table["Group"].unique()
+def pdf_dirs() -> tuple:
+    """Directories of the pdf and data - residual figures"""
+    return (
+        os.path.join(paths.output_dir, "pdf"),
+        os.path.join(paths.output_dir, "avg_data_residual"),
+    )
+
 
-# def group_key(s):
-#     num = int(s.split('+')[0])
-#     priority = 0 if s.split('+')[1] == 'I_F' else 1
-#     return num, priority
+def full_table_path() -> str:
+    """Path of full_table.csv (made by table_creator)"""
+    return os.path.join(paths.input_dir, "full_table.csv")
 
-# groups_sorted = sorted(groups, key=group_key)
-#### The same as above is done in a single line below
-groups_sorted = groups_sorted = sorted(
-    groups, key=lambda s: (int(s.split("+")[0]), 0 if s.split("+")[1] == "I_F" else 1)
-)
 
-print(groups_sorted)
+def read_groups() -> tuple:
+    """
+    Groups of full_table.csv, in the order of the table and sorted by class
+    then I_F first (read when the grids are written, not at import, so the
+    module can be imported before table_creator made the table)
+    """
+    import pandas as pd
+
+    table_path = full_table_path()
+    if not os.path.exists(table_path):
+        raise FileNotFoundError(
+            f"{table_path} does not exist yet, make it first with table_creator "
+            "(nptables)"
+        )
+    full_table = pd.read_csv(table_path, index_col=False)
+    groups = full_table["Group"].unique()
+
+    # def group_key(s):
+    #     num = int(s.split('+')[0])
+    #     priority = 0 if s.split('+')[1] == 'I_F' else 1
+    #     return num, priority
+
+    # groups_sorted = sorted(groups, key=group_key)
+    #### The same as above is done in a single line below
+    groups_sorted = sorted(
+        groups,
+        key=lambda s: (int(s.split("+")[0]), 0 if s.split("+")[1] == "I_F" else 1),
+    )
+    return groups, groups_sorted
 
 
 def latex_images(images, doublecol: bool, folder, super_folder=None):
@@ -149,6 +174,9 @@ def generate_all_latex_figures(cfg: GridConfig) -> None:
     """
     Main latex grid image generator
     """
+    pdf_dir, data_res_dir = pdf_dirs()
+    groups, groups_sorted = read_groups()
+    logger.info("Groups of the grids: %s", groups_sorted)
 
     if os.path.exists(paths.latex_dir):
         shutil.rmtree(paths.latex_dir)
@@ -290,5 +318,12 @@ def main():
     print(f"Running {__file__.rsplit('/',maxsplit=1)[-1]} directly")
     logger.info(f"Running {__file__.rsplit('/',maxsplit=1)[-1]} directly")
 
+    # Before the prompts: without the table there is nothing to ask for
+    if not os.path.exists(full_table_path()):
+        logger.error(
+            "%s does not exist yet, make it first with table_creator (nptables)",
+            full_table_path(),
+        )
+        sys.exit(1)
     cfg = load_variables_grid(reverse=True)
     generate_all_latex_figures(cfg)
@@ -0,0 +1,1669 @@
+"""
+Single-pass renderer of every figure variant of the disks.
+plotter_w_decorators and plotter_w_decorators_w_residuals each had their own
+loop over cfg.subset, their own FITS reads and profile load, so making both the
+classic cutouts and the residual set meant two full passes over the inputs.
+Here every figure is a FigureVariant (a template builder and a draw function)
+and plot_disk loads the inputs of a disk once, in a DiskState, and draws from it
+all the variants asked for in cfg.variants.
+plotter_w_decorators and plotter_w_decorators_w_residuals are left as thin
+wrappers choosing their variants, so the figures of both can also be made in
+the same pass (load_variables(variants=...)). Every figure is drawn from the
+input columns of full_table (made by table_creator.py), the feature labels of
+gap_ring_infl_pt.csv and the frank profiles.
+"""
+
+# === Standard Library ===
+from functools import wraps
+import gc
+import os
+import time
+import warnings
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+# === Third-Party ===
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from tqdm import tqdm
+from astropy.utils.exceptions import AstropyWarning
+
+# === Internal ===
+
+from bhowmik2025_et_al_plots.utils import (
+    get_bundle,
+    close_bundles,
+    read_ahead,
+    arc_to_au,
+    FixTicks as ft,
+    PathUtils,
+    imap_disks,
+    encode_within_budget,
+    get_writer,
+    close_writer,
+    BuildManifest,
+    MANIFEST_FILE,
+    RANK_COLUMN,
+    select_shard,
+    shard_manifest_path,
+    FigureTemplate,
+    ImagePanel,
+    get_template,
+    release_template,
+    close_templates,
+    reset_profile_axis,
+    add_profile_metrics,
+    radius_column,
+    get_profile_store,
+    FEATURE_STYLES,
+    get_features,
+    index_features,
+    add_center_pixels,
+    smoothed_window,
+    smoothed_peak,
+    SMOOTH_HALO,
+    get_image_stats,
+    enable_tracing,
+    take_spans,
+    thread_disk,
+    span,
+    profiled,
+    stage_summary,
+    write_trace,
+    close_stray_figures,
+    DiskMemory,
+    MemoryProbe,
+    memory_summary,
+    memory_table,
+    COLORS,
+    blank_tile,
+    draw_polyline,
+    encode_png,
+    hstack_tiles,
+    image_tile,
+)
+
+warnings.simplefilter("ignore", category=AstropyWarning)
+################################################################################
+
+paths = PathUtils()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlotConfig:
+    """Store variable names and types to be called as configs by load_variables
+    and set as cfg parameters in plotter()
+    """
+
+    features_data: pd.DataFrame
+    feature_index: dict
+    subset: pd.DataFrame
+    index_to_groups: dict
+    im_type: str
+    data_res_type: str
+    verbose: bool
+    flux_ordered: bool
+    smooth: bool
+    special_cases: dict
+    zoom_factor: int
+    first_file: int
+    last_file: int
+    delimiter: int
+    dpi: int
+    data_res: bool
+    variants: tuple = ("cutout", "data_res")
+    shard: tuple = None
+    jobs: int = 1
+    tasks_per_worker: int = 10
+    incremental: bool = True
+    trace: bool = False
+    profile_disks: tuple = None
+    memory: bool = False
+    preview: bool = False
+    raster_dpi: int = None
+    max_bytes: int = None
+    writer_threads: int = 2
+    read_ahead: int = 2
+
+
+@dataclass(frozen=True)
+class FigureVariant:
+    """
+    One kind of figure made for every disk
+
+    name : key of the variant in VARIANTS and cfg.variants
+    kind : "cutout" (saved in cfg.im_type) or "data_res" (saved in
+        cfg.data_res_type, only when cfg.data_res)
+    builder : makes the FigureTemplate of the variant
+    draw : draw(template, disk, cfg) updates the template for a DiskState
+    centers : images whose pixel centers load_variables adds to the subset
+    """
+
+    name: str
+    kind: str
+    builder: Callable
+    draw: Callable
+    centers: tuple
+
+
+def ask_plot_options() -> dict:
+    """
+    Ask for the flux ordering, the data - residual figures and the range of
+    files: flux_ordered, data_res, first_file and last_file of build_config
+    """
+    ################################################################################
+    # Ask user if they want to proceed with flux-ordered (PDF) output
+    proceed = (
+        input(
+            "\nDo you want to proceed with flux-ordered output as PDF files? [Y/n] (blank=True):\n"
+        )
+        .strip()
+        .lower()
+    )
+    # Reevaluate flux_ordered i.e. if the images will be saved as pngs or pdfs by the user
+    if proceed in ["", "y", "yes"]:
+        flux_ordered = True
+    else:
+        flux_ordered = False
+
+    data_res_choice = (
+        input(
+            "\n Do you want to proceed to set the data - residual output options? [Y/n] (blank=True):\n"
+        )
+        .strip()
+        .lower()
+    )
+    if data_res_choice in ["", "y", "yes"]:
+        data_res = True
+    else:
+        data_res = False
+
+    first_file_input = input("\n Start index (blank = 0): ")
+    last_file_input = input("End index (blank or 'None' = no end):")
+
+    first_file = (
+        int(first_file_input)
+        if first_file_input.strip().lower() not in ("", "none")
+        else 0
+    )
+    last_file = (
+        int(last_file_input)
+        if last_file_input.strip().lower() not in ("", "none")
+        else None
+    )
+
+    return {
+        "flux_ordered": flux_ordered,
+        "data_res": data_res,
+        "first_file": first_file,
+        "last_file": last_file,
+    }
+
+
+def load_variables(
+    verbose: bool = False,
+    smooth: bool = False,
+    _zoom_factor: int = 1,
+    dpi_pdf: int = 600,
+    dpi_png: int = 100,
+    **kwargs,
+) -> PlotConfig:
+    """
+    Interactive front end of build_config: asks for the flux ordering, the data
+    - residual figures and the range of files (ask_plot_options). Other keyword
+    arguments (variants, delimiter, jobs, ...) go to build_config as they are
+    """
+    return build_config(
+        verbose=verbose,
+        smooth=smooth,
+        zoom_factor=_zoom_factor,
+        dpi_pdf=dpi_pdf,
+        dpi_png=dpi_png,
+        **ask_plot_options(),
+        **kwargs,
+    )
+
+
+def build_config(
+    verbose: bool = False,
+    smooth: bool = False,
+    zoom_factor: int = 1,
+    flux_ordered: bool = True,
+    dpi_pdf: int = 600,
+    dpi_png: int = 100,
+    data_res: bool = True,
+    first_file: int = 0,
+    last_file: int = None,
+    delimiter: int = 101,
+    variants: tuple = ("cutout", "data_res"),
+    shard: tuple = None,
+    jobs: int = 1,
+    tasks_per_worker: int = 10,
+    incremental: bool = True,
+    trace: bool = False,
+    profile_disks: tuple = None,
+    memory: bool = False,
+    preview: bool = False,
+    raster_dpi: int = None,
+    max_bytes: int = None,
+    writer_threads: int = 2,
+    read_ahead: int = 2,
+) -> PlotConfig:
+    """
+    Load all the variables to be used in the main plotter() function, without
+    asking anything (batch runs, see cli.py)
+
+    Parameters
+    ----------
+    flux_ordered : bool
+        Disks sorted by B8_Flux and saved as numbered pdfs, otherwise as pngs.
+    data_res : bool
+        Also save the data - residual variants.
+    first_file, last_file : int
+        Range of rows of full_table plotted (last_file None = no end).
+    delimiter : int
+        At most delimiter + 1 disks of the range are plotted.
+    variants : tuple
+        Names of the figures made for every disk (see VARIANTS).
+    shard : tuple
+        (index, count): only the disks of the selection with a global rank
+        equal to index modulo count (see utils.sharding); None = all of them.
+    trace : bool
+        Time every stage of every disk and export the spans to outputs/trace
+        (see utils.tracing).
+    profile_disks : tuple
+        (first, last): run the disks of global rank in [first, last) under
+        cProfile, stats saved in outputs/trace/profiles.
+    memory : bool
+        Also trace the Python allocations of every disk with tracemalloc
+        (slower); the RSS and open figures are always checked (see
+        utils.memory).
+    preview : bool
+        Quick-look pngs made without matplotlib (see draw_preview) instead of
+        the figure variants, in outputs/preview.
+    raster_dpi : int
+        pdf figures with their image layers and shaded bands (hatched spans,
+        uncertainty band) rasterized at raster_dpi, text and lines staying
+        vectors; None = images at dpi_pdf and the bands as vector paths.
+    max_bytes : int
+        Budget of every figure: one that is larger is encoded again with its
+        raster layers at a lower resolution (see
+        utils.figure_writer.encode_within_budget).
+    writer_threads : int
+        Threads writing the encoded figures (fsynced) while the next ones
+        are drawn, in every process (see utils.background_writer); 0 = every
+        figure written before going on.
+    read_ahead : int
+        Disks whose inputs (profile, FITS headers and windows) are read on
+        threads while the current one is drawn, without worker processes
+        (see DiskState.prefetch); 0 = read when the disk is drawn.
+    """
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        raise ValueError(
+            f"Unknown figure variants {unknown}, choose from {list(VARIANTS)}"
+        )
+
+    csv_features: str = (
+        f"{paths.input_dir}/gap_ring_infl_pt.csv"  # <-- Your annotated features file
+    )
+    features_data = pd.read_csv(csv_features, index_col=False)
+    features_data["Target"] = features_data["Target"].astype(str).str.lower()
+    full_table = pd.read_csv(f"{paths.input_dir}/full_table.csv", index_col=False)
+    # Binary store of the frank profiles (built by table_creator, brought up to
+    # date here so the workers only read it). A shard only reads it too: the
+    # process starting the shards updates it once (see cli.run_local_shards)
+    store = get_profile_store(paths.cache_dir)
+    if shard is None:
+        store.update(full_table["path_rad"])
+    if radius_column(0.95) not in full_table:
+        # full_table.csv made before the R90/R95 columns existed
+        logger.info("Computing the R90/R95 columns missing from full_table.csv")
+        full_table = add_profile_metrics(full_table, store=store)
+
+    index_to_groups = full_table.groupby(by="id")["Group"].apply(func=list).to_dict()
+
+    # Directory of the data - residual figures, whatever the image type
+    _data_res_type = "avg_data_residual"
+    if flux_ordered:
+        _im_type = "pdf"
+        full_table = full_table.sort_values("B8_Flux", kind="stable")
+        dpi = dpi_pdf
+    else:
+        _im_type = "png"
+        dpi = dpi_png
+
+    logger.info(
+        "flux_ordered was set to %s, and files will be saved as %s with %s dpi",
+        flux_ordered,
+        _im_type,
+        dpi,
+    )
+    if data_res:
+        logger.info(
+            "data_res was set to %s, and data - residual files will be saved as %s with %s dpi",
+            data_res,
+            _data_res_type,
+            dpi,
+        )
+
+    # Global rank of every disk, number of its files whatever part of the
+    # sample (range or shard) is plotted
+    full_table[RANK_COLUMN] = np.arange(len(full_table))
+
+    if last_file is None:
+        last_file = len(full_table)
+    logger.info("You have chosen  [ %d - %d ] range of files", first_file, last_file)
+    if preview:
+        logger.info("Preview pngs (no matplotlib) in %s", PREVIEW_DIR)
+    else:
+        logger.info("Figure variants: %s", ", ".join(variants))
+    if jobs > 1:
+        logger.info(
+            "Rendering with %d worker processes (recycled every %d disks)",
+            jobs,
+            tasks_per_worker,
+        )
+
+    ### At most delimiter + 1 disks of the range are plotted
+    subset = full_table[first_file:last_file][: delimiter + 1]
+    if shard is not None:
+        subset = select_shard(subset, shard)
+        logger.info("Shard %d of %d: %d disks", shard[0], shard[1], len(subset))
+    # Center of each disk in pixels of the images the variants need (Trisha's
+    # FK5 coordinates, all parsed and converted at once)
+    centers = {image for name in variants for image in VARIANTS[name].centers}
+    if preview:
+        centers |= set(PREVIEW_CENTERS)
+    enable_tracing(trace, disk="(config)")
+    with span("wcs"):
+        subset = add_center_pixels(
+            subset, {image: f"path_{image}" for image in sorted(centers)}
+        )
+    # Display statistics of the images of the subset (made by table_creator,
+    # brought up to date here so the workers only read them; same as the
+    # profile store for a shard)
+    if shard is None:
+        get_image_stats(paths.input_dir).update_table(subset)
+    ####################################################################
+    # adding SPECIAL CASES
+    sc_newvmin = ["odisea_c4_41", "odisea_c4_143", "odisea_c4_51"]
+    sc_smooth = list(
+        full_table[(full_table["Stage"] == 0) | (full_table["Stage"] == 1)]["field"]
+    )
+    logger.info("%d Stage 0/1 disks are smoothed", len(sc_smooth))
+
+    sc_fill_blank_model = ["odisea_c4_094a", "odisea_c4_094b"]
+    sc_nomodel = [""]  # ["odisea_c4_094b"]
+    special_cases = {
+        "smooth": sc_smooth,
+        "apply_1%": sc_newvmin,
+        "fillmodel": sc_fill_blank_model,
+        "nomodel": sc_nomodel,
+    }
+
+    ####################################################################
+
+    return PlotConfig(
+        features_data=features_data,
+        feature_index=index_features(features_data),
+        subset=subset,
+        index_to_groups=index_to_groups,
+        im_type=_im_type,
+        data_res_type=_data_res_type,
+        verbose=verbose,
+        flux_ordered=flux_ordered,
+        smooth=smooth,
+        zoom_factor=zoom_factor,
+        first_file=first_file,
+        last_file=last_file,
+        delimiter=delimiter,
+        dpi=dpi,
+        special_cases=special_cases,
+        data_res=data_res,
+        variants=tuple(variants),
+        shard=shard,
+        jobs=jobs,
+        tasks_per_worker=tasks_per_worker,
+        incremental=incremental,
+        trace=trace,
+        profile_disks=profile_disks,
+        memory=memory,
+        preview=preview,
+        raster_dpi=raster_dpi,
+        max_bytes=max_bytes,
+        writer_threads=writer_threads,
+        read_ahead=read_ahead,
+    )
+
+
+def time_and_loadbar_decorator(func) -> None:
+    """
+    Decorator to calculate elapsed time and show progress bar
+    """
+
+    @wraps(func)
+    def wrapper(cfg):
+        # Up to the end of the generator, i.e. once the last figure of the last
+        # disk is written and the templates closed
+        initial_time = time.perf_counter()
+        result = list(tqdm(func(cfg), desc="Processing files", total=len(cfg.subset)))
+        elapsed_time = time.perf_counter() - initial_time
+        minutes = int(elapsed_time // 60)
+        secs = f"{elapsed_time % 60:05.2f}"
+
+        logger.info("Elapsed plotting/saving time: %02d:%s", minutes, secs)
+
+        return result
+
+    return wrapper
+
+
+class DiskState:
+    """
+    Inputs of one disk (a row of cfg.subset), loaded on first use and shared by
+    every variant drawn for it: FITS windows (through the disk bundle),
+    normalized radial profile, display statistics and zoom geometry
+
+    Usage
+    -----
+    with DiskState(cfg, row) as disk:
+        data, center = disk.window("avg_data", radius_pix)
+    """
+
+    def __init__(self, cfg: PlotConfig, row) -> None:
+        self.row = row
+        self.name = row.field
+        self.dist = row.Distance
+        self.r_zoom = row.R_zoom
+        self.smooth_case = self.name in cfg.special_cases["smooth"]
+        with span("fits_open"):
+            self.bundle = get_bundle(row)
+        self.image_stats = get_image_stats(paths.input_dir)
+        self._profile = None
+
+        boxsize_au = (
+            np.round((self.r_zoom * 2) * arc_to_au(self.dist), -1) / cfg.zoom_factor
+        )  # Value -1 corresponds to rounding to the nearest 10 au
+        self.boxsize_au = boxsize_au
+        # set_myticks widens the view of the data panels up to the outermost tick
+        self.view_radius_arcsec = ft(boxsize_au).get_view_radius(
+            self.r_zoom * arc_to_au(self.dist)
+        ) / arc_to_au(self.dist)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.bundle.close()
+
+    def profile(self) -> tuple:
+        """(r_au, flux, flux error) of the frank profile, normalized to its peak"""
+        if self._profile is None:
+            # Read-only views of the binary profile store
+            with span("profile_load"):
+                r_arcsec, flxx, err_flxx = get_profile_store(paths.cache_dir).get(
+                    self.row.path_rad
+                )
+            flux_max = np.nanmax(flxx)
+            self._profile = (
+                r_arcsec * arc_to_au(self.dist),
+                flxx / flux_max,
+                err_flxx / flux_max,
+            )
+        return self._profile
+
+    def pixel_scale(self, image: str) -> float:
+        """arcsec / pixel of image (data, model, avg_data or residual)"""
+        with span("wcs"):
+            if image == "model":
+                return self.row.Rmax_frank * 2 / self.bundle["model"].header["NAXIS1"]
+            return self.bundle[image].pixel_scale
+
+    def center(self, image: str) -> tuple:
+        """
+        Center of the disk in pixels of the full image (computed for the whole
+        subset by load_variables; the residuals are on the grid of avg_data)
+        """
+        if image == "model":
+            imsize_model_pix = self.bundle["model"].header["NAXIS1"]
+            return imsize_model_pix / 2, imsize_model_pix / 2
+        if image == "residual":
+            image = "avg_data"
+        return (
+            getattr(self.row, f"center_x_pix_{image}"),
+            getattr(self.row, f"center_y_pix_{image}"),
+        )
+
+    def window(self, image: str, radius_pix: float) -> tuple:
+        """(window of image around the disk, center in pixels of the window)"""
+        center_x, center_y = self.center(image)
+        with span(f"fits_read:{image}"):
+            data, (x0, y0) = self.bundle[image].read_window(
+                (center_x, center_y), radius_pix
+            )
+        return data, (center_x - x0, center_y - y0)
+
+    def smoothed(self, image: str, radius_pix: float) -> tuple:
+        """Same as window, smoothed or taken from the cache"""
+        center_x, center_y = self.center(image)
+        with span(f"smoothing:{image}"):
+            data, (x0, y0) = smoothed_window(
+                self.bundle[image],
+                (center_x, center_y),
+                radius_pix,
+                cache_dir=paths.cache_dir,
+            )
+        return data, (center_x - x0, center_y - y0)
+
+    def smoothed_peak(self, image: str) -> float:
+        """Peak of the full image, smoothed (top of its colour scale)"""
+        with span(f"smoothing:{image}"):
+            return smoothed_peak(
+                getattr(self.row, f"path_{image}"), cache_dir=paths.cache_dir
+            )
+
+    def stats(self, image: str):
+        """Display statistics of the full image"""
+        return self.image_stats[getattr(self.row, f"path_{image}")]
+
+    def prefetch(self, cfg: PlotConfig) -> None:
+        """
+        Read what the figures of the disk read, ahead of them (see
+        prefetch_disk): the profile, the headers and, for every image, the
+        widest window drawn (the view of the data panels, with the halo of
+        the smoothing if it may apply), of which the other windows are views.
+        The images are those whose centers build_config added (the ones the
+        variants draw), with the residual of avg_data and the model. The
+        smoothing itself is left to the figures
+        """
+        self.profile()
+        margin = SMOOTH_HALO if cfg.smooth or self.smooth_case else 0
+        images = [
+            image
+            for image in ("data", "avg_data")
+            if hasattr(self.row, f"center_x_pix_{image}")
+        ]
+        if "avg_data" in images:
+            images.append("residual")
+        for image in images + ["model"]:
+            if image == "model":
+                radius_pix = self.r_zoom / self.pixel_scale(image)
+            else:
+                radius_pix = self.view_radius_arcsec / self.pixel_scale(image)
+            with span(f"fits_read:{image}"):
+                self.bundle[image].read_window(
+                    self.center(image),
+                    radius_pix,
+                    margin=margin if image in ("data", "avg_data") else 0,
+                )
+
+
+################################################################################
+# Helpers shared by the variants
+
+
+def set_zoom(panel: ImagePanel, center: tuple, radius_pix: float, zoom_factor):
+    """View of radius_pix / zoom_factor around center"""
+    center_x, center_y = center
+    panel.set_view(
+        (center_x - radius_pix / zoom_factor, center_x + radius_pix / zoom_factor),
+        (center_y - radius_pix / zoom_factor, center_y + radius_pix / zoom_factor),
+    )
+
+
+def model_vmin(cfg: PlotConfig, disk: DiskState, vmax: float) -> float:
+    """Lower colour limit of the model panel, as a fraction of vmax"""
+    if disk.row.isbinary == 1:
+        return 0.1 * vmax
+    if disk.name in cfg.special_cases["apply_1%"]:
+        logger.info(f"1% as vmin were applied to {disk.name}")
+        return 0.01 * vmax
+    return 0.05 * vmax  # rms_model
+
+
+def fill_blank_model(cfg: PlotConfig, disk: DiskState, ax) -> None:
+    """Black background behind the models with blank (or no) pixels"""
+    if (
+        disk.name in cfg.special_cases["fillmodel"]
+        or disk.name in cfg.special_cases["nomodel"]
+    ):
+        ax.set_facecolor("black")
+
+
+def draw_profile(ax, cfg: PlotConfig, disk: DiskState, uncertainty: bool) -> None:
+    """
+    Normalized radial profile with the annotated features, the radius enclosing
+    95% of the flux and the model threshold; with uncertainty, the band of the
+    frank error combined with the ALMA flux calibration error
+    """
+    name = disk.name
+    reset_profile_axis(ax)
+    if name in cfg.special_cases["nomodel"]:
+        ax.plot()
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.set_xticklabels([])
+        ax.set_yticklabels([])
+        ax.set_xlabel("")
+        ax.set_ylabel("")
+        ax.set_facecolor("black")
+        return
+
+    r_au, flxx, err_flxx = disk.profile()
+    ax.plot(r_au, flxx, "k-", linewidth=2)
+    if uncertainty:
+        ## equation of flux uncertainty propagation - band 8, ALMA ##
+        # Propagating I_uncer with, e.g. ALMA absolute flux calibration uncertainty  (15% at Band 8 ) would be a step in the right direction if you wanted to make the uncertainties more representative. There are still other sources of uncertainty that we aren't considering but its still useful #
+
+        ## just combine the frank uncertainty with the ALMA flux uncertainty :  ( (I_uncer/I)^2 + (0.15)^2) ) ##
+        uncert_flxx = np.sqrt(err_flxx**2 + (0.15 * flxx) ** 2)
+        ax.fill_between(
+            r_au,
+            flxx - uncert_flxx,
+            flxx + uncert_flxx,
+            color="blue",
+            alpha=0.4,
+            label=r"$\sigma_I$",
+            rasterized=cfg.raster_dpi is not None,
+        )
+
+    # Labels sorted by feature number and their radii, indexed once by
+    # load_variables
+    sorted_labels, r_features_au = get_features(cfg.feature_index, name)
+    y_profiles = np.interp(r_features_au, r_au, flxx)
+    for idx, (feature_label, r_feature_au, y_profile) in enumerate(
+        zip(sorted_labels, r_features_au, y_profiles)
+    ):
+        if feature_label[:1] not in FEATURE_STYLES:
+            continue  # Skip unknown features
+        color, linestyle = FEATURE_STYLES[feature_label[:1]]
+        ax.vlines(
+            r_feature_au,
+            ymin=y_profile,
+            ymax=0.78,
+            color=color,
+            linestyle=linestyle,
+        )
+
+        if y_profile < 0.78:
+            y_text = 0.8 + 0.11 * (idx % 2)
+        else:
+            y_text = 0.65 * y_profile
+        ax.text(
+            r_feature_au,
+            y_text,
+            feature_label,
+            color=color,
+            fontsize=12,
+            ha="center",
+            va="bottom",
+            rotation=90,
+            fontweight="bold",
+        )
+
+    ax.set_xlabel("Radius (au)", fontsize=16, fontweight="bold")
+    ax.set_ylabel("Normalized Intensity", fontsize=16, fontweight="bold")
+
+    # Write tick labels in boldface
+    for label in ax.get_xticklabels() + ax.get_yticklabels():
+        label.set_fontweight("bold")
+    ax.minorticks_on()
+    ax.set_xlim(left=0)
+    ax.set_ylim(bottom=0)
+
+    right_limit = ax.get_xlim()[1]
+
+    # Radius enclosing 95% of the flux, preserving rings (see
+    # utils.profile_metrics), computed for the whole sample by table_creator
+    r_max = getattr(disk.row, radius_column(0.95))
+    ax.axvline(r_max, color="black", linestyle=":", lw=2.5, alpha=0.8)
+    if disk.row.isbinary == 1:
+        imax = 0.1
+    elif name in cfg.special_cases["apply_1%"]:
+        imax = 0.01
+    else:
+        imax = 0.05
+    rasterized = cfg.raster_dpi is not None
+    ax.axhspan(0, imax, alpha=0.2, color="red", rasterized=rasterized)
+    ax.axhline(imax, color="black", linestyle=":", lw=2.5, alpha=0.8)
+    ax.axvspan(
+        r_max,
+        right_limit,
+        alpha=0.2,
+        color="gray",
+        hatch="/",
+        rasterized=rasterized,
+    )
+
+
+def draw_data_panel(
+    panel: ImagePanel, cfg: PlotConfig, disk: DiskState, image: str, smooth: bool
+) -> float:
+    """
+    Zoom on image (data or avg_data) with its beam, name and flux; smoothed
+    disks have a colorbar up to their smoothed peak. Returns the pixel scale
+    """
+    with span(f"panel:{image}"):
+        pixel_scale = disk.pixel_scale(image)
+        view_radius_pix = disk.view_radius_arcsec / pixel_scale
+        if smooth:
+            data, center = disk.smoothed(image, view_radius_pix)
+        else:
+            data, center = disk.window(image, view_radius_pix)
+
+        panel.reset()
+        set_zoom(panel, center, disk.r_zoom / pixel_scale, cfg.zoom_factor)
+        ## Fixing ticks (pix) and labels (au) ###
+        ft(disk.boxsize_au, ax0=panel.ax).set_myticks(disk.dist, pixel_scale, *center)
+        # Image, cropped to the limits set above
+        panel.show(
+            data,
+            vmin=disk.row.rms_data,
+            vmax=disk.smoothed_peak(image) if smooth else disk.stats(image).peak,
+        )
+        ## Updating patches ###
+        panel.set_beam(
+            disk.row.beam_maj, disk.row.beam_min, disk.row.beam_pa, pixel_scale
+        )
+        panel.set_texts(name=disk.name, flux=disk.row.B8_Flux)
+    return pixel_scale
+
+
+def draw_zoom_panel(
+    panel: ImagePanel,
+    cfg: PlotConfig,
+    disk: DiskState,
+    image: str,
+    vmin,
+    vmax,
+    widen: bool,
+) -> None:
+    """
+    Zoom on image (avg_data or residual) with its own ticks, image panels of
+    the data - residual figures. With widen, the view grows up to the outermost
+    tick (ticks set after the limits), otherwise it stays R_zoom
+    """
+    with span(f"panel:{image}"):
+        pixel_scale = disk.pixel_scale(image)
+        radius_pix = disk.r_zoom / pixel_scale
+        ## Fixing ticks (pix) and labels (au) ###
+        if widen:
+            data, center = disk.window(image, disk.view_radius_arcsec / pixel_scale)
+            set_zoom(panel, center, radius_pix, cfg.zoom_factor)
+            ft(disk.boxsize_au, ax0=panel.ax).set_myticks(
+                disk.dist, pixel_scale, *center
+            )
+        else:
+            data, center = disk.window(image, radius_pix)
+            ft(disk.boxsize_au, ax0=panel.ax).set_myticks(
+                disk.dist, pixel_scale, *center
+            )
+            set_zoom(panel, center, radius_pix, cfg.zoom_factor)
+        panel.show(data, vmin=vmin, vmax=vmax)
+
+
+def model_window(disk: DiskState) -> tuple:
+    """(R_zoom window of the model, center, radius in pixels)"""
+    radius_pix = disk.r_zoom / disk.pixel_scale("model")
+    data_model, center = disk.window("model", radius_pix)
+    return data_model, center, radius_pix
+
+
+################################################################################
+# Variants
+
+
+def build_cutout_figure() -> FigureTemplate:
+    """
+    Data | model | radial profile figure. Built once per process and updated
+    by plot_disk for every disk
+    """
+    fig = plt.figure(figsize=(15, 5), layout="constrained")
+
+    data_panel = ImagePanel(
+        fig,
+        fig.add_subplot(131),
+        beam=True,
+        name_text=True,
+        flux_text=True,
+        colorbar=True,
+        cmap="turbo",
+        aspect="equal",
+    )
+    data_panel.ax.set_xlabel(r"$\Delta$RA (au)", fontsize=16, fontweight="bold")
+    data_panel.ax.set_ylabel(r"$\Delta$DEC (au)", fontsize=16, fontweight="bold")
+
+    model_panel = ImagePanel(fig, fig.add_subplot(132), cmap="turbo", aspect="equal")
+
+    ax_profile = fig.add_subplot(133)
+    ax_profile.tick_params(axis="both", width=1, top=True, right=True, labelsize=14)
+
+    data_panel.ax.set_box_aspect(1)
+    model_panel.ax.set_box_aspect(1)
+    ax_profile.set_box_aspect(0.99)
+
+    return FigureTemplate(fig, data=data_panel, model=model_panel, profile=ax_profile)
+
+
+def draw_cutout(template: FigureTemplate, disk: DiskState, cfg: PlotConfig) -> None:
+    """Data | model | radial profile of disk"""
+    #################### AX0 - DATA #################################################
+    data_panel = template["data"]
+    ax0 = data_panel.ax
+    draw_data_panel(
+        data_panel, cfg, disk, "data", smooth=cfg.smooth or disk.smooth_case
+    )
+
+    #################### AX1 - MODEL ###################################
+    with span("panel:model"):
+        model_panel = template["model"]
+        ax1 = model_panel.ax
+        model_panel.reset()
+        data_model, center_model, radius_model_pix = model_window(disk)
+        stats_model = disk.stats("model")
+        vmin = model_vmin(cfg, disk, stats_model.peak)
+
+        if disk.name in cfg.special_cases["nomodel"]:
+            model_panel.show_empty(data_model.shape)
+            ax1.set_xticks([])
+            ax1.set_yticks([])
+            ax1.set_xticklabels([])
+            ax1.set_yticklabels([])
+            ax1.set_xlabel("")
+            ax1.set_ylabel("")
+        else:
+            set_zoom(model_panel, center_model, radius_model_pix, cfg.zoom_factor)
+            ## Fixing ticks (pix) and labels (au) ###
+            ft(ax0=ax0, ax1=ax1).set_adapted_ticks()
+            model_panel.show(data_model, vmin=vmin, vmax=stats_model.finite_max)
+            ax1.set_xlabel(r"$\Delta$RA (au)", fontsize=16, fontweight="bold")
+            ax1.set_ylabel(r"$\Delta$DEC (au)", fontsize=16, fontweight="bold")
+        fill_blank_model(cfg, disk, ax1)
+
+    #################### AX2 - RADIAL_PROFILE ######################################
+    with span("panel:profile"):
+        draw_profile(template["profile"], cfg, disk, uncertainty=False)
+
+
+def build_residual_figure() -> FigureTemplate:
+    """
+    Data | model | residual | radial profile figure. Built once per process and
+    updated by plot_disk for every disk
+    """
+    fig = plt.figure(figsize=(20, 5))  # , layout="constrained")
+    gs = fig.add_gridspec(1, 4, wspace=0)
+
+    data_panel = ImagePanel(
+        fig,
+        fig.add_subplot(gs[0, 0]),
+        beam=True,
+        name_text=True,
+        flux_text=True,
+        colorbar=True,
+        cbarlabel=True,
+        cmap="turbo",
+        aspect="equal",
+    )
+    data_panel.ax.set_xlabel(r"$\Delta$RA (au)", fontsize=16, fontweight="bold")
+    data_panel.ax.set_ylabel(r"$\Delta$DEC (au)", fontsize=16, fontweight="bold")
+
+    model_panel = ImagePanel(
+        fig, fig.add_subplot(gs[0, 1]), type_text="Model", cmap="turbo"
+    )
+    residual_panel = ImagePanel(
+        fig,
+        fig.add_subplot(gs[0, 2]),
+        type_text="Residual",
+        cmap="turbo",
+        aspect="equal",
+    )
+    residual_panel.ax.set_xlabel(r"$\Delta$RA (au)", fontsize=16, fontweight="bold")
+
+    ax_profile = fig.add_subplot(gs[0, 3])
+    ax_profile.tick_params(axis="both", width=1, top=True, right=True, labelsize=14)
+    pos3 = ax_profile.get_position()
+    ax_profile.set_position([pos3.x0 + 0.05, pos3.y0, pos3.width, pos3.height])
+
+    return FigureTemplate(
+        fig,
+        data=data_panel,
+        model=model_panel,
+        residual=residual_panel,
+        profile=ax_profile,
+    )
+
+
+def draw_cutout_residual(
+    template: FigureTemplate, disk: DiskState, cfg: PlotConfig
+) -> None:
+    """avg_data | model | residual | radial profile (with errors) of disk"""
+    #################### AX0 - DATA #################################################
+    data_panel = template["data"]
+    ax0 = data_panel.ax
+    # IMPORTANT CONDITION (AND INSTEAD OF OR AS IN draw_cutout, PAY ATTENTION)
+    draw_data_panel(
+        data_panel, cfg, disk, "avg_data", smooth=cfg.smooth and disk.smooth_case
+    )
+
+    #################### AX1 - MODEL ###################################
+    with span("panel:model"):
+        model_panel = template["model"]
+        ax1 = model_panel.ax
+        model_panel.reset()
+        data_model, center_model, radius_model_pix = model_window(disk)
+        vmax = disk.stats("model").finite_max
+        vmin = model_vmin(cfg, disk, vmax)
+
+        if disk.name in cfg.special_cases["nomodel"]:
+            model_panel.show_empty(data_model.shape)
+            model_panel.type_text.set_visible(False)
+            ax1.set_xlabel("")
+            ax1.set_ylabel("")
+        else:
+            set_zoom(model_panel, center_model, radius_model_pix, cfg.zoom_factor)
+            ## Fixing ticks (pix) and labels (au) ###
+            ft(ax0=ax0, ax1=ax1).set_adapted_ticks()
+            model_panel.show(data_model, vmin=vmin, vmax=vmax)
+            ax1.set_yticklabels([])
+            ax1.set_xlabel(r"$\Delta$RA (au)", fontsize=16, fontweight="bold")
+            ax1.set_ylabel("")
+        fill_blank_model(cfg, disk, ax1)
+
+    #################### ax2 - residual ######################################
+    with span("panel:residual"):
+        residual_panel = template["residual"]
+        ax2 = residual_panel.ax
+        residual_panel.reset()
+        pixel_scale_residual = disk.pixel_scale("residual")
+        data_residual, center_residual = disk.window(
+            "residual", disk.r_zoom / pixel_scale_residual
+        )
+        set_zoom(
+            residual_panel,
+            center_residual,
+            disk.r_zoom / pixel_scale_residual,
+            cfg.zoom_factor,
+        )
+        if disk.name in cfg.special_cases["nomodel"]:
+            residual_panel.image.set_visible(False)
+        else:
+            stats_avg_data = disk.stats("avg_data")
+            residual_panel.show(
+                data_residual,
+                vmin=stats_avg_data.finite_min,
+                vmax=stats_avg_data.finite_max,
+            )
+        ft(ax0=ax0, ax1=ax2).set_adapted_ticks()
+        ax2.set_yticklabels([])
+
+    #################### ax3 - RADIAL_PROFILE ######################################
+    ax3 = template["profile"]
+    with span("panel:profile"):
+        draw_profile(ax3, cfg, disk, uncertainty=True)
+        ax3.legend(loc="upper right")
+
+
+def build_data_res_figure() -> FigureTemplate:
+    """
+    avg_data | residual figure. Built once per process and updated by plot_disk
+    for every disk
+    """
+    fig = plt.figure(figsize=(10, 5), layout="constrained")
+
+    avg_data_panel = ImagePanel(
+        fig,
+        fig.add_subplot(121),
+        name_text=True,
+        type_text="Data",
+        colorbar=True,
+        cbarlabel=True,
+        cmap="turbo",
+        aspect="equal",
+    )
+    residual_panel = ImagePanel(
+        fig, fig.add_subplot(122), type_text="Residual", cmap="turbo", aspect="equal"
+    )
+    for panel in (avg_data_panel, residual_panel):
+        panel.ax.set_xlabel(r"$\Delta$RA (au)", fontsize=16, fontweight="bold")
+        panel.ax.set_ylabel(r"$\Delta$DEC (au)", fontsize=16, fontweight="bold")
+        panel.ax.set_box_aspect(1)
+
+    return FigureTemplate(fig, avg_data=avg_data_panel, residual=residual_panel)
+
+
+def draw_data_res(template: FigureTemplate, disk: DiskState, cfg: PlotConfig) -> None:
+    """avg_data | residual of disk, both with the colour limits of avg_data"""
+    stats_avg_data = disk.stats("avg_data")
+    vmin, vmax = stats_avg_data.finite_min, stats_avg_data.finite_max
+
+    avg_data_panel = template["avg_data"]
+    draw_zoom_panel(avg_data_panel, cfg, disk, "avg_data", vmin, vmax, widen=True)
+    avg_data_panel.set_texts(name=disk.name)
+
+    draw_zoom_panel(
+        template["residual"], cfg, disk, "residual", vmin, vmax, widen=False
+    )
+
+
+def build_data_res_model_figure() -> FigureTemplate:
+    """
+    avg_data | model | residual figure. Built once per process and updated by
+    plot_disk for every disk
+    """
+    fig = plt.figure(figsize=(15, 5), layout="constrained")
+
+    avg_data_panel = ImagePanel(
+        fig,
+        fig.add_subplot(131),
+        name_text=True,
+        type_text="Data",
+        colorbar=True,
+        cbarlabel=True,
+        cmap="turbo",
+        aspect="equal",
+    )
+    model_panel = ImagePanel(fig, fig.add_subplot(132), cmap="turbo", aspect="equal")
+    residual_panel = ImagePanel(
+        fig, fig.add_subplot(133), type_text="Residual", cmap="turbo", aspect="equal"
+    )
+    for panel in (avg_data_panel, residual_panel):
+        panel.ax.set_xlabel(r"$\Delta$RA (au)", fontsize=16, fontweight="bold")
+        panel.ax.set_ylabel(r"$\Delta$DEC (au)", fontsize=16, fontweight="bold")
+        panel.ax.set_box_aspect(1)
+
+    return FigureTemplate(
+        fig, avg_data=avg_data_panel, model=model_panel, residual=residual_panel
+    )
+
+
+def draw_data_res_model(
+    template: FigureTemplate, disk: DiskState, cfg: PlotConfig
+) -> None:
+    """
+    avg_data | model | residual of disk; the residual takes the colour limits
+    of the model panel
+    """
+    stats_avg_data = disk.stats("avg_data")
+    avg_data_panel = template["avg_data"]
+    draw_zoom_panel(
+        avg_data_panel,
+        cfg,
+        disk,
+        "avg_data",
+        stats_avg_data.finite_min,
+        stats_avg_data.finite_max,
+        widen=True,
+    )
+    avg_data_panel.set_texts(name=disk.name)
+
+    with span("panel:model"):
+        model_panel = template["model"]
+        ax1 = model_panel.ax
+        model_panel.reset()
+        data_model, center_model, radius_model_pix = model_window(disk)
+        stats_model = disk.stats("model")
+        vmax = stats_model.peak
+        vmin = model_vmin(cfg, disk, vmax)
+
+        if disk.name in cfg.special_cases["nomodel"]:
+            model_panel.show_empty(data_model.shape)
+            ax1.set_xticks([])
+            ax1.set_yticks([])
+            ax1.set_xticklabels([])
+            ax1.set_yticklabels([])
+        else:
+            # No adapted ticks on this panel: its axes show the pixels of the
+            # full model image, so the window is drawn at its place in it
+            center_full = disk.center("model")
+            set_zoom(model_panel, center_full, radius_model_pix, cfg.zoom_factor)
+            model_panel.show(
+                data_model,
+                vmin=vmin,
+                vmax=stats_model.finite_max,
+                origin=(
+                    center_full[0] - center_model[0],
+                    center_full[1] - center_model[1],
+                ),
+            )
+        fill_blank_model(cfg, disk, ax1)
+
+    draw_zoom_panel(
+        template["residual"], cfg, disk, "residual", vmin, vmax, widen=False
+    )
+
+
+# Every figure plot_disk can make, by name
+VARIANTS = {
+    variant.name: variant
+    for variant in (
+        FigureVariant("cutout", "cutout", build_cutout_figure, draw_cutout, ("data",)),
+        FigureVariant(
+            "cutout_residual",
+            "cutout",
+            build_residual_figure,
+            draw_cutout_residual,
+            ("avg_data",),
+        ),
+        FigureVariant(
+            "data_res", "data_res", build_data_res_figure, draw_data_res, ("avg_data",)
+        ),
+        FigureVariant(
+            "data_res_model",
+            "data_res",
+            build_data_res_model_figure,
+            draw_data_res_model,
+            ("avg_data",),
+        ),
+    )
+}
+
+
+def saved_variants(cfg: PlotConfig) -> list:
+    """
+    (variant, output directory) of the variants of cfg.variants saved in this
+    run. The first variant of each kind is saved where the plotters always
+    saved it (the directories read by images_latex), the others in a directory
+    of their own
+    """
+    saved = []
+    kinds = set()
+    for name in cfg.variants:
+        variant = VARIANTS[name]
+        if variant.kind == "data_res" and not cfg.data_res:
+            continue
+        base_dir = cfg.im_type if variant.kind == "cutout" else cfg.data_res_type
+        if variant.kind in kinds:
+            base_dir = f"{base_dir}_{variant.name}"
+        kinds.add(variant.kind)
+        saved.append((variant, base_dir))
+    return saved
+
+
+################################################################################
+# Preview
+
+# Directory of the preview pngs, size (pixels) of each of their panels
+PREVIEW_DIR = "preview"
+PREVIEW_TILE = 256
+# Images whose pixel centers the preview needs (the residual is on the avg_data
+# grid)
+PREVIEW_CENTERS = ("data", "avg_data")
+
+
+def preview_limits(cfg: PlotConfig, disk: DiskState, image: str) -> tuple:
+    """Colour limits of image in the preview, those of the publication figures"""
+    if image == "data":
+        return disk.row.rms_data, disk.stats("data").peak
+    if image == "model":
+        stats_model = disk.stats("model")
+        return model_vmin(cfg, disk, stats_model.peak), stats_model.finite_max
+    stats_avg_data = disk.stats("avg_data")
+    return stats_avg_data.finite_min, stats_avg_data.finite_max
+
+
+def profile_tile(cfg: PlotConfig, disk: DiskState, size: int) -> np.ndarray:
+    """
+    Normalized radial profile (0 to 1.1) of disk as a polyline, with the
+    annotated features and the radius enclosing 95% of the flux
+    """
+    tile = blank_tile(size)
+    if disk.name in cfg.special_cases["nomodel"]:
+        return tile
+    r_au, flxx, _ = disk.profile()
+    scale_x = (size - 1) / max(np.nanmax(r_au), 1)
+    scale_y = (size - 1) / 1.1
+
+    r_max = getattr(disk.row, radius_column(0.95))
+    draw_polyline(tile, [r_max * scale_x] * 2, [0, size - 1], COLORS["gray"])
+    for label, r_feature in zip(*get_features(cfg.feature_index, disk.name)):
+        if label[:1] in FEATURE_STYLES:
+            color = COLORS[FEATURE_STYLES[label[:1]][0]]
+            draw_polyline(tile, [r_feature * scale_x] * 2, [0, 0.78 * scale_y], color)
+    draw_polyline(tile, r_au * scale_x, flxx * scale_y, COLORS["k"])
+    return tile
+
+
+def draw_preview(cfg: PlotConfig, disk: DiskState, size: int = PREVIEW_TILE):
+    """
+    data | model | residual | radial profile of disk as a uint8 RGB array,
+    without matplotlib: the R_zoom windows are block averaged to size pixels
+    and mapped through the turbo lookup table (see utils.raster)
+    """
+    tiles = []
+    for image in ("data", "model", "residual"):
+        if image != "data" and disk.name in cfg.special_cases["nomodel"]:
+            # Black, as the blank models of the publication figures
+            tiles.append(np.zeros((size, size, 3), dtype=np.uint8))
+            continue
+        radius_pix = disk.r_zoom / disk.pixel_scale(image) / cfg.zoom_factor
+        data, center = disk.window(image, radius_pix)
+        vmin, vmax = preview_limits(cfg, disk, image)
+        tiles.append(image_tile(data, center, radius_pix, vmin, vmax, size))
+    tiles.append(profile_tile(cfg, disk, size))
+    return hstack_tiles(tiles)
+
+
+def preview_name(cfg: PlotConfig, row) -> str:
+    """File name of the preview of a disk"""
+    if cfg.flux_ordered:
+        return f"{getattr(row, RANK_COLUMN):03d}_{row.field}_preview.png"
+    return f"{row.field}_preview.png"
+
+
+def image_name(cfg: PlotConfig, variant: FigureVariant, row) -> str:
+    """
+    File name of a variant of a disk, numbered by its global rank
+    """
+    count, name = getattr(row, RANK_COLUMN), row.field
+    if variant.kind == "data_res":
+        return f"{count:03d}_{name}_data_residual.pdf"
+    if cfg.flux_ordered:
+        return f"{count:03d}_{name}_cutout.pdf"
+    return f"{name}_cutout.png"
+
+
+def prefetch_disk(cfg: PlotConfig, row) -> DiskState:
+    """
+    DiskState of row with its inputs read, on a read-ahead thread of plotter.
+    If a read fails, the disk is handed over as it is and the render thread
+    reads it again (and reports the error where it always did)
+    """
+    with thread_disk(row.field), span("read_ahead"):
+        disk = DiskState(cfg, row)
+        try:
+            disk.prefetch(cfg)
+        except Exception:  # pylint: disable=broad-except
+            logger.debug("Read-ahead of %s failed", row.field, exc_info=True)
+    return disk
+
+
+def plot_disk(cfg: PlotConfig, count: int, row, disk: DiskState = None) -> int:
+    """
+    Plot and save every variant of a single disk, i.e. one row of cfg.subset.
+    Kept at module level so the worker processes of plotter() can call it.
+    The inputs are loaded once, in a DiskState (disk, if it was read ahead,
+    see prefetch_disk), and the figures are the templates of the variants,
+    only their artists are updated here. The figures are encoded here and
+    written by the writer of the process (see utils.background_writer),
+    under the key row.field
+    """
+    if cfg.verbose:
+        print("\n", 50 * "#")
+        logger.info(f"Processing {count}, of source id {row.id}: {row.path_data}")
+
+    writer = get_writer(cfg.writer_threads)
+    groups = cfg.index_to_groups.get(row.id, [])
+    if disk is None:
+        disk = DiskState(cfg, row)
+    # Every FITS file of the disk is opened and read once, for all its figures
+    with disk:
+        if cfg.preview:
+            with span("preview"):
+                payload = encode_png(draw_preview(cfg, disk))
+            name = preview_name(cfg, row)
+            base_dir = os.path.join(paths.output_dir, PREVIEW_DIR)
+            writer.submit(row.field, payload, name, base_dir, groups)
+            if cfg.verbose:
+                for group in groups:
+                    print(f"Preview saved in: \n {os.path.join(base_dir, group, name)}")
+            return count
+
+        for variant, base_dir in saved_variants(cfg):
+            with span(f"figure_build:{variant.name}"):
+                template = get_template(variant.name, variant.builder)
+            with span(f"draw:{variant.name}"):
+                variant.draw(template, disk, cfg)
+            if not groups:
+                continue
+
+            name = image_name(cfg, variant, row)
+            fmt = os.path.splitext(name)[1].lstrip(".")
+            # Encoded once, before the template is drawn again, then written
+            # (or linked) to every group directory by the writer
+            with span(f"savefig:{variant.name}"):
+                with span(f"encode:{fmt}"):
+                    payload = encode_within_budget(
+                        template.fig,
+                        fmt=fmt,
+                        dpi=figure_dpi(cfg, name),
+                        max_bytes=cfg.max_bytes,
+                    )
+                writer.submit(
+                    row.field,
+                    payload,
+                    name,
+                    os.path.join(paths.output_dir, base_dir),
+                    groups,
+                )
+            # The encode left its renderer (and the rasters at the dpi of the
+            # file) in the figure: build it again for the next disk instead
+            release_template(variant.name)
+            if cfg.verbose:
+                for group in groups:
+                    save_path = os.path.join(paths.output_dir, base_dir, group, name)
+                    print(f"Image saved as {name} in: \n {save_path}")
+                    print(50 * "#")
+
+    return count
+
+
+def trace_dir(cfg: PlotConfig) -> str:
+    """Directory of the spans and cProfile stats of the run of cfg"""
+    if cfg.shard is None:
+        return os.path.join(paths.output_dir, "trace")
+    return os.path.join(paths.output_dir, "trace_shard-{}-of-{}".format(*cfg.shard))
+
+
+def figure_dpi(cfg: PlotConfig, name: str) -> int:
+    """Resolution of the figure saved as name (raster layers only for a pdf)"""
+    if cfg.raster_dpi is not None and name.endswith(".pdf"):
+        return cfg.raster_dpi
+    return cfg.dpi
+
+
+@dataclass
+class DiskReport:
+    """What render_disk hands back to plotter for one disk"""
+
+    count: int
+    spans: list
+    memory: DiskMemory
+    # bytes of each figure, by "<directory>/<file name>"; None while the
+    # writer of the main process is still writing them (see settled_reports)
+    sizes: dict = None
+
+
+def release_memory() -> None:
+    """
+    Close the templates and collect the figures closed so far (matplotlib
+    figures are reference cycles, freed by the garbage collector only)
+    """
+    close_templates()
+    gc.collect()
+
+
+def render_disk(cfg: PlotConfig, count: int, row, disk: DiskState = None) -> DiskReport:
+    """
+    plot_disk (of disk, if read ahead) with the instrumentation of cfg. With
+    cfg.profile_disks, the disks of rank in that range run under cProfile.
+    Figures other than the templates are closed after every disk, and the
+    templates too if the disk fails (they may be half drawn) or the process grew
+    by more than RSS_GROWTH_LIMIT since the previous disk (release_memory). In a
+    worker process, or without writer threads, the disk is handed back once its
+    figures are written
+    """
+    enable_tracing(cfg.trace, disk=row.field)
+    profile_path = None
+    if cfg.profile_disks is not None:
+        first, last = cfg.profile_disks
+        rank = getattr(row, RANK_COLUMN)
+        if first <= rank < last:
+            profile_path = os.path.join(
+                trace_dir(cfg), "profiles", f"{rank:03d}_{row.field}.prof"
+            )
+    with MemoryProbe(
+        row.field, trace_python=cfg.memory, on_growth=release_memory
+    ) as probe:
+        try:
+            with profiled(profile_path), span("disk"):
+                plot_disk(cfg, count, row, disk)
+        except BaseException:
+            close_templates()
+            raise
+        finally:
+            probe.stray_figures = close_stray_figures()
+    if probe.stray_figures:
+        logger.warning(
+            "%d figures were left open by %s", probe.stray_figures, row.field
+        )
+    sizes = None
+    if cfg.jobs > 1 or not cfg.writer_threads:
+        sizes = figure_sizes(get_writer(cfg.writer_threads).wait(row.field))
+    return DiskReport(count, take_spans(), probe.result, sizes)
+
+
+def figure_sizes(written: dict) -> dict:
+    """Bytes of the figures written (by path), by <directory>/<file name>"""
+    sizes = {}
+    for path, size in written.items():
+        # Every group holds the same file
+        base_dir = os.path.relpath(path, paths.output_dir).split(os.sep)[0]
+        sizes[f"{base_dir}/{os.path.basename(path)}"] = size
+    return sizes
+
+
+def settled_reports(pending: list, rows: list, writer, block: bool):
+    """
+    Pop and yield, in order, the DiskReports of pending whose figures are
+    written by writer (with their sizes); all of them, waiting for writer, if
+    block. Raises the error of a figure that could not be written
+    """
+    while pending:
+        report = pending[0]
+        if report.sizes is None:
+            field = rows[report.count].field
+            if not (block or writer.done(field)):
+                return
+            report.sizes = figure_sizes(writer.wait(field))
+        yield pending.pop(0)
+
+
+def output_paths(cfg: PlotConfig, row) -> list:
+    """
+    Every file plot_disk() saves for a disk
+    """
+    outputs = []
+    if cfg.preview:
+        return [
+            os.path.join(paths.output_dir, PREVIEW_DIR, group, preview_name(cfg, row))
+            for group in cfg.index_to_groups.get(row.id, [])
+        ]
+    for group in cfg.index_to_groups.get(row.id, []):
+        for variant, base_dir in saved_variants(cfg):
+            outputs.append(
+                os.path.join(
+                    paths.output_dir,
+                    base_dir,
+                    group,
+                    image_name(cfg, variant, row),
+                )
+            )
+    return outputs
+
+
+@time_and_loadbar_decorator
+def plotter(cfg: PlotConfig):
+    """
+    Main plotting function initialized in the for ranging the data and model fits files.
+    With cfg.jobs > 1 the disks are rendered across a pool of worker processes.
+    With cfg.incremental, disks whose outputs were built from the same inputs
+    (see build_manifest.json in the outputs directory) are skipped.
+    A shard (cfg.shard) records its outputs in a manifest of its own, merged
+    by merge_shards. With cfg.trace, the spans of every stage of every disk
+    are exported to trace_dir(cfg) (see utils.tracing)
+    """
+    rows = list(cfg.subset.itertuples(index=False))
+    # Spans of build_config (WCS of the subset)
+    spans = take_spans()
+    manifest_path = os.path.join(paths.output_dir, MANIFEST_FILE)
+    manifest = BuildManifest(manifest_path)
+    if cfg.shard is not None:
+        manifest = manifest.restricted(
+            shard_manifest_path(manifest_path, cfg.shard),
+            [out for row in rows for out in output_paths(cfg, row)],
+        )
+
+    builds: dict = {}
+    for count, row in enumerate(rows):
+        outputs = output_paths(cfg, row)
+        digest = manifest.disk_digest(cfg, row)
+        if cfg.incremental and manifest.is_current(outputs, digest):
+            if cfg.verbose:
+                logger.info("Skipping %s, its figures are up to date", row.field)
+            yield count
+            continue
+        builds[count] = (outputs, digest)
+    logger.info("%d of %d disks need to be plotted", len(builds), len(rows))
+
+    if cfg.jobs > 1:
+        done = imap_disks(
+            render_disk, cfg, list(builds), cfg.jobs, cfg.tasks_per_worker
+        )
+    else:
+        # The inputs of the next cfg.read_ahead disks are read while one is drawn
+        done = (
+            render_disk(cfg, count, rows[count], disk)
+            for count, disk in read_ahead(
+                lambda count: prefetch_disk(cfg, rows[count]),
+                list(builds),
+                depth=cfg.read_ahead,
+            )
+        )
+
+    def settled():
+        # A disk is recorded in the manifest once its figures are written
+        writer = get_writer(cfg.writer_threads)
+        pending: list = []
+        for report in done:
+            pending.append(report)
+            yield from settled_reports(pending, rows, writer, block=False)
+        yield from settled_reports(pending, rows, writer, block=True)
+
+    memory: list = []
+    sizes: dict = {}
+    try:
+        for report in settled():
+            count = report.count
+            spans.extend(report.spans)
+            memory.append(report.memory)
+            sizes[rows[count].field] = report.sizes
+            manifest.record(*builds[count])
+            manifest.save()
+            yield count
+    finally:
+        # Also when a disk fails or the generator is closed early; the figures
+        # still queued are written (and fsynced) before the run ends
+        close_writer()
+        close_templates()
+        close_bundles()
+        enable_tracing(False)
+    # Spans of the last writes of the main process
+    spans.extend(take_spans())
+
+    log_memory(cfg, memory)
+    log_sizes(cfg, sizes)
+    if cfg.trace and spans:
+        write_trace(spans, trace_dir(cfg))
+        summary = stage_summary(spans)
+        logger.info(
+            "Slowest stages (s), spans in %s:\n%s",
+            trace_dir(cfg),
+            summary.head(15).to_string(float_format="%.3f"),
+        )
+
+
+def log_memory(cfg: PlotConfig, memory: list) -> None:
+    """
+    High-water marks of the DiskMemory of a run, in the log; with cfg.trace or
+    cfg.memory, every disk in memory.csv next to the spans
+    """
+    summary = memory_summary(memory)
+    if not summary:
+        return
+    logger.info(
+        "Memory: peak RSS %.0f MiB, largest RSS after a disk %.0f MiB (%s), "
+        "largest growth %.1f MiB (%s), %d stray figures closed, "
+        "released after %d disks",
+        summary["peak_rss_mib"],
+        summary["max_rss_mib"],
+        summary["max_rss_disk"],
+        summary["max_growth_mib"],
+        summary["max_growth_disk"],
+        summary["stray_figures"],
+        summary["releases"],
+    )
+    if "traced_peak_mib" in summary:
+        logger.info(
+            "Memory: tracemalloc peak %.1f MiB (%s)",
+            summary["traced_peak_mib"],
+            summary["traced_peak_disk"],
+        )
+    if cfg.trace or cfg.memory:
+        os.makedirs(trace_dir(cfg), exist_ok=True)
+        memory_table(memory).to_csv(
+            os.path.join(trace_dir(cfg), "memory.csv"), index=False
+        )
+
+
+def log_sizes(cfg: PlotConfig, sizes: dict) -> None:
+    """
+    Bytes of the figures of a run ({disk: {figure: bytes}}) in the log; with
+    cfg.trace, every figure in sizes.csv next to the spans
+    """
+    table = pd.DataFrame(
+        [
+            (disk, figure, size)
+            for disk, figures in sizes.items()
+            for figure, size in figures.items()
+        ],
+        columns=["disk", "figure", "bytes"],
+    )
+    if table.empty:
+        return
+    largest = table.loc[table["bytes"].idxmax()]
+    message = "Figures: %d files, %.1f MiB, %.0f KiB per figure, largest %.0f KiB (%s)"
+    args = [
+        len(table),
+        table["bytes"].sum() / 2**20,
+        table["bytes"].mean() / 2**10,
+        largest["bytes"] / 2**10,
+        largest["figure"],
+    ]
+    if cfg.max_bytes:
+        message += ", %d over the budget of %.0f KiB"
+        args += [int((table["bytes"] > cfg.max_bytes).sum()), cfg.max_bytes / 2**10]
+    logger.info(message, *args)
+    if cfg.trace:
+        os.makedirs(trace_dir(cfg), exist_ok=True)
+        table.to_csv(os.path.join(trace_dir(cfg), "sizes.csv"), index=False)
+
+
+def merge_shards(cfg: PlotConfig, count: int) -> None:
+    """
+    Merge the manifests of the count shards of the run of cfg (made without
+    shard) into build_manifest.json, once every figure of the selection is
+    there and up to date. Raises RuntimeError listing the missing disks
+    otherwise, without merging anything
+    """
+    manifest_path = os.path.join(paths.output_dir, MANIFEST_FILE)
+    manifest = BuildManifest(manifest_path)
+    shard_paths = [
+        shard_manifest_path(manifest_path, (index, count)) for index in range(count)
+    ]
+    for shard_path in shard_paths:
+        if os.path.exists(shard_path):
+            manifest.merge(BuildManifest(shard_path))
+
+    missing = []
+    for row in cfg.subset.itertuples(index=False):
+        outputs = output_paths(cfg, row)
+        digest = manifest.disk_digest(cfg, row)
+        # Disks of no group have no figures
+        if outputs and not manifest.is_current(outputs, digest):
+            missing.append(row.field)
+    if missing:
+        raise RuntimeError(
+            f"{len(missing)} of {len(cfg.subset)} disks are missing or out of date "
+            f"after {count} shards: {', '.join(missing[:10])}"
+            + (", ..." if len(missing) > 10 else "")
+        )
+
+    manifest.save()
+    for shard_path in shard_paths:
+        if os.path.exists(shard_path):
+            os.remove(shard_path)
+    logger.info("Merged %d shards, %d disks up to date", count, len(cfg.subset))
@@ -11,10 +11,17 @@ Also provides full_table.csv, containing those paths
 
 import logging
 import os
-import re
 import pandas as pd
 
-from bhowmik2025_et_al_plots.utils import PathUtils
+from bhowmik2025_et_al_plots.utils import (
+    CATALOG_MANIFEST_FILE,
+    CatalogIndex,
+    CatalogManifest,
+    PathUtils,
+    add_profile_metrics,
+    get_profile_store,
+    get_image_stats,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +29,17 @@ paths = PathUtils()
 
 
 # Check if the directory exists
-def creating_tables(verbose: bool = False, debug: bool = False) -> None:
+def creating_tables(
+    verbose: bool = False, debug: bool = False, skip_unchanged: bool = True
+) -> None:
     """
     Only function of this file designed to join and manipulate tables specific
     to the data of this science case.
+    With skip_unchanged, nothing is done if no input file (fits, frank profiles,
+    table.csv) changed since full_table.csv was written. Otherwise the whole
+    table is built again, which takes milliseconds: the slow part, reading the
+    profiles and measuring the images, only touches the files that changed
+    (ProfileStore and image_stats.csv keep the others).
     """
     if not os.path.exists(paths.fits_dir):
         raise FileNotFoundError(
@@ -35,164 +49,33 @@ def creating_tables(verbose: bool = False, debug: bool = False) -> None:
         raise FileNotFoundError(
             f"The specified directory does not exist: {paths.data_res_dir}"
         )
-    # Create a pandas dataframe of all .fits files in the directory,
-    # with their full paths
-
-    rows: list = []
-    # COUNTER = 0
-    for counter, file in enumerate(os.listdir(paths.fits_dir)):
-        if file.endswith(".fits"):
-            has_odisea: str = "ODISEA" in file
-            # has_odisea = 0 if has_odisea else False
-
-            has_frank: str = "frank" in file
-            ismodel: bool = True if has_frank else False
-
-            # has_iso_oph: str = "ISO_Oph" in file
-            # is_iso_oph = True if has_iso_oph else False
-
-            has_ra: str = "RA" in file
-            # is_ra = True if has_ra else False
-
-            ### YOU NEED TO CHECK IF THE NEXT CONDITIONS ARE CORRECT BY
-            ### COMPARING THE TABLES (NUMBER OF ROWS)####
-            if has_odisea:
-                source_list: list = re.split(r"[_]+", file)[0:3]
-            elif has_ra:
-                source_list: list = re.split(r"[_]+", file)[0:1]
-            else:
-                source_list: list = re.split(r"[_]+", file)[0:2]
-            #############################################################
-
-            source = "_".join(source_list)
-            # path = os.path.join(paths.fits_dir, file)
-            rows.append(
-                {
-                    "id": counter,
-                    "field": source,
-                    "is model": ismodel,
-                    "path": os.path.join(paths.fits_dir, file),
-                }
-            )
-            # COUNTER += 1
-
-    rows_rad: list = []
-
-    for file_rad in os.listdir(paths.radial_prof_dir):
-        if file_rad.endswith(".txt"):
-            has_odisea: str = "ODISEA" in file_rad
-            # has_iso_oph: str = "ISO_Oph" in file_rad
-            has_ra: str = "RA" in file_rad
-
-            ### YOU NEED TO CHECK IF THE NEXT CONDITIONS ARE CORRECT BY
-            ### COMPARING THE TABLES (NUMBER OF ROWS)####
-            if has_odisea:
-                source_list: list = re.split(r"[_]+", file_rad)[0:3]
-            elif has_ra:
-                source_list: list = re.split(r"[_]+", file_rad)[0:1]
-            else:
-                source_list: list = re.split(r"[_]+", file_rad)[0:2]
-            #############################################################
-
-            source = "_".join(source_list)
-            path_rad = os.path.join(paths.radial_prof_dir, file_rad)
-        rows_rad.append({"field_rad": source, "path_rad": path_rad})
-
-    rows_data_res: list = []
-    for counter, file_data_res in enumerate(os.listdir(paths.data_res_dir)):
-        if file_data_res.endswith(".fits"):
-            # has_spec_avg_data: str = "data" in file
-
-            has_resid: str = "residual" in file_data_res
-            isres: bool = True if has_resid else False
-
-            has_odisea: str = "ODISEA" in file_data_res
-            has_ra: str = "RA" in file_data_res
-
-            ### YOU NEED TO CHECK IF THE NEXT CONDITIONS ARE CORRECT BY
-            ### COMPARING THE TABLES (NUMBER OF ROWS)####
-            if has_odisea:
-                source_list: list = re.split(r"[_]+", file_data_res)[0:3]
-            elif has_ra:
-                source_list: list = re.split(r"[_]+", file_data_res)[0:1]
-            else:
-                source_list: list = re.split(r"[_]+", file_data_res)[0:2]
-            #############################################################
-
-            source = "_".join(source_list)
-            # path = os.path.join(paths.fits_dir, file)
-            rows_data_res.append(
-                {
-                    # "id": counter,
-                    "field_res": source,
-                    "is res": isres,
-                    "path_data_res": os.path.join(paths.data_res_dir, file_data_res),
-                }
-            )
-            # COUNTER += 1
-
-    ######### Create a pandas dataframe with the rows ###################
-    ##### rows = [{"id":dummy-counter ,"field": source, "is model": bolean,
-    # "path": path-to-fits-files, "path_rad": path-to-png-radial-profs}]
-    table = pd.DataFrame(rows, columns=["id", "field", "is model", "path"])
-    table = pd.merge(
-        table, pd.DataFrame(rows_rad), left_on="field", right_on="field_rad"
-    ).drop("field_rad", axis=1)
-    print(table.head(), "\n")
-    table = pd.merge(
-        table,
-        pd.DataFrame(rows_data_res),
-        left_on=["field", "is model"],
-        right_on=["field_res", "is res"],
-    ).drop("field_res", axis=1)
-    # Sorting, fixing indexes, fixing "field" problems
-    table = table.sort_values(by=["field"])
-    table = table.reset_index(drop=True)
-    # table["id"] = table.index
-    table["field"] = table["field"].str.strip().str.lower()
-    ##########################################################
-    # Creating a data and model identical tables to merge them again
-    # keeping path of data and model in the same lines of full_table
+    # One os.scandir pass over fits_files, frank_profiles and
+    # spec_avg_data_residual: every file goes by its field and kind (data,
+    # rad, avg_data, model, residual)
+    index = CatalogIndex.scan(paths)
+    sources = [f"{paths.input_dir}/table.csv"]
+    outputs = [
+        f"{paths.input_dir}/table_paths.csv",
+        f"{paths.input_dir}/full_table.csv",
+    ]
+    manifest = CatalogManifest(os.path.join(paths.cache_dir, CATALOG_MANIFEST_FILE))
+    signature = index.signature()
+    if skip_unchanged and manifest.is_current(signature, sources, outputs):
+        logger.info(
+            "full_table.csv is up to date (%d files, table.csv unchanged)",
+            len(index.files),
+        )
+        return
 
-    # table_realdata_nomodelcol = (
-    #     table[table["is model"] == False]
-    #     .drop("is model", axis=1)
-    #     .reset_index(drop=True)
-    # )
-    # table_realdata_nomodelcol["id"] = table_realdata_nomodelcol.index
-    ### Creating the real data table ####
-    table_realdata = (
-        table[(~table["is model"]) & (~table["is res"])]
-        .drop(columns=["is model", "is res", "id"])
-        .reset_index(drop=True)
-    )
-    # table_realdata["id"] = table_realdata.index
-    table_realdata = table_realdata.rename(
-        columns={"path": "path_data", "path_data_res": "path_avg_data"}
-    )
-    #### Creating the model table ####
-    table_model = (
-        table[table["is model"] & table["is res"]]
-        .drop(columns=["is model", "is res", "id"])
-        .reset_index(drop=True)
-    )
-    # table_model["id"] = table_model.index
-    table_model = table_model.rename(
-        columns={"path": "path_model", "path_data_res": "path_residual"}
-    )
-    # table_model = table_model.rename(
-    #     columns={"path": "path_model"}
-    # )
     #### IMPORTANT: table_nomodelcol is the full table predecessor,
     # before merging with the table Trisha gave me
     # Dont make confusion!!
-    table_nomodelcol = pd.merge(
-        table_realdata,
-        table_model,
-        left_on=("field", "path_rad"),
-        right_on=("field", "path_rad"),
-        validate="1:1",
-    )
+    # One row per field with all five files: field, path_data, path_rad,
+    # path_avg_data, path_model, path_residual
+    table_nomodelcol = index.table()
+    if debug:
+        print("Fields without all their files:")
+        print(index.incomplete())
     #####################################################################
 
     ######### Read table that Trisha gave me ###########
@@ -207,15 +90,13 @@ def creating_tables(verbose: bool = False, debug: bool = False) -> None:
     ########## Debugging mismatches! #####################
     # Find rows in table_realdata that do not have a match
     # in table_sizes
-    not_in_sizes = table_nomodelcol.merge(
-        table_sizes, on=["field"], how="left", indicator=True
-    ).query('_merge == "left_only"')
+    not_in_sizes = table_nomodelcol[
+        ~table_nomodelcol["field"].isin(table_sizes["field"])
+    ]
 
     # Find rows in table_sizes that do not have a match in
     # table_realdata
-    not_in_realdata = table_sizes.merge(
-        table_nomodelcol, on=["field"], how="left", indicator=True
-    ).query('_merge == "left_only"')
+    not_in_realdata = table_sizes[~table_sizes["field"].isin(table_nomodelcol["field"])]
 
     if debug:
 
@@ -278,6 +159,15 @@ def creating_tables(verbose: bool = False, debug: bool = False) -> None:
     full_table["Group"] = full_table["Stage"].astype(str) + "+" + full_table["Class"]
     full_table["Group"] = full_table["Group"].str.strip()
 
+    # Binary store of the frank profiles, so the plotters do not parse the text
+    # files again
+    store = get_profile_store(paths.cache_dir).update(full_table["path_rad"])
+    # Enclosed-flux radii of the radial profiles (R90_au, R95_au), computed for
+    # the whole sample at once instead of once per disk by the plotters
+    full_table = add_profile_metrics(full_table, store=store)
+    # Display statistics (colour limits) of every image, in image_stats.csv
+    get_image_stats(paths.input_dir).update_table(full_table)
+
     # table.to_csv(f"{paths.input_dir}/fits_files.csv", index=False)
     # logger.info("Saved table.csv successfully!")
     # if verbose:
@@ -299,6 +189,7 @@ def creating_tables(verbose: bool = False, debug: bool = False) -> None:
     #         50 * "#",
     #     )
     full_table.to_csv(f"{paths.input_dir}/full_table.csv", index=False)
+    manifest.record(signature, sources, outputs)
     logger.info("Saved full_table.csv successfully!")
     if verbose:
         print(
@@ -3,10 +3,97 @@ This module contains internal utility classes and modules and constants
 for the bhowmik2025 plots project.
 
 It also contains the paths to various directories used in the project.
+The names below are imported from their submodule on first use, so importing
+one of them (e.g. PathUtils for the LaTeX grids) does not load matplotlib,
+astropy or scipy.
 """
 
-from .add_patches import AddPatches
+import importlib
+
+# Functions named as their submodule: imported now, as loading the submodule
+# later would set the attribute of the package to the module itself
 from .arc_to_au import arc_to_au
-from .fix_ticks import FixTicks
+from .read_ahead import read_ahead
+
+# Submodule of every name of the package
+_EXPORTS = {
+    "AddPatches": "add_patches",
+    "FixTicks": "fix_ticks",
+    "ROOT_ENV": "paths",
+    "PathUtils": "paths",
+    "enable_tracing": "tracing",
+    "profiled": "tracing",
+    "span": "tracing",
+    "stage_summary": "tracing",
+    "take_spans": "tracing",
+    "thread_disk": "tracing",
+    "write_trace": "tracing",
+    "imap_disks": "parallel",
+    "encode_within_budget": "figure_writer",
+    "save_bytes_to_groups": "figure_writer",
+    "BackgroundWriter": "background_writer",
+    "close_writer": "background_writer",
+    "get_writer": "background_writer",
+    "MANIFEST_FILE": "build_manifest",
+    "BuildManifest": "build_manifest",
+    "RANK_COLUMN": "sharding",
+    "parse_disk_range": "sharding",
+    "parse_shard": "sharding",
+    "select_shard": "sharding",
+    "shard_manifest_path": "sharding",
+    "FitsWindow": "fits_window",
+    "DiskBundle": "fits_bundle",
+    "close_bundles": "fits_bundle",
+    "get_bundle": "fits_bundle",
+    "ProfileStore": "profile_store",
+    "get_profile_store": "profile_store",
+    "add_profile_metrics": "profile_metrics",
+    "radius_column": "profile_metrics",
+    "FEATURE_STYLES": "feature_index",
+    "get_features": "feature_index",
+    "index_features": "feature_index",
+    "add_center_pixels": "sky_centers",
+    "get_wcs": "sky_centers",
+    "SMOOTH_HALO": "smoothing",
+    "SMOOTH_SIGMA": "smoothing",
+    "smoothed_peak": "smoothing",
+    "smoothed_window": "smoothing",
+    "ImageStats": "image_stats",
+    "get_image_stats": "image_stats",
+    "FigureTemplate": "figure_templates",
+    "ImagePanel": "figure_templates",
+    "close_stray_figures": "figure_templates",
+    "close_templates": "figure_templates",
+    "get_template": "figure_templates",
+    "release_template": "figure_templates",
+    "reset_profile_axis": "figure_templates",
+    "DiskMemory": "memory",
+    "MemoryProbe": "memory",
+    "RSS_GROWTH_LIMIT": "memory",
+    "memory_summary": "memory",
+    "memory_table": "memory",
+    "COLORS": "raster",
+    "blank_tile": "raster",
+    "draw_polyline": "raster",
+    "encode_png": "raster",
+    "hstack_tiles": "raster",
+    "image_tile": "raster",
+    "CATALOG_MANIFEST_FILE": "catalog",
+    "CatalogIndex": "catalog",
+    "CatalogManifest": "catalog",
+    "source_field": "catalog",
+}
+
+__all__ = ["arc_to_au", "read_ahead", *_EXPORTS]
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
 
-from .paths import PathUtils
\ No newline at end of file
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_EXPORTS))
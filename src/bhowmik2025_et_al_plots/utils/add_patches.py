@@ -45,6 +45,42 @@ class AddPatches:
         """
         import matplotlib.patches as mpatches
 
+        ellipse1 = mpatches.Ellipse(
+            (0, 0),
+            width=1,
+            height=1,
+            edgecolor="red",
+            facecolor="white",
+            alpha=1,
+            linestyle="solid",
+            lw=1.5,
+        )
+        self.update_beam(
+            ellipse1,
+            bmaj,
+            bmin,
+            bpa,
+            pixscale_arcsec_per_pix,
+            offset_fraction_x,
+            offset_fraction_y,
+        )
+
+        return self.ax.add_patch(ellipse1)
+
+    def update_beam(
+        self,
+        beam,
+        bmaj: float,
+        bmin: float,
+        bpa: float,
+        pixscale_arcsec_per_pix: float,
+        offset_fraction_x: float = 0.15,
+        offset_fraction_y: float = 0.15,
+    ):
+        """
+        Set the geometry of a beam ellipse made by add_beam, for the current
+        limits of the axis. Parameters are the ones of add_beam.
+        """
         # Convert bmaj/bmin from arcsec to pixels
         bmaj_pix = bmaj / pixscale_arcsec_per_pix
         bmin_pix = bmin / pixscale_arcsec_per_pix
@@ -58,19 +94,11 @@ class AddPatches:
         offset_x = xlim[0] + offset_fraction_x * (xlim[1] - xlim[0])
         offset_y = ylim[0] + offset_fraction_y * (ylim[1] - ylim[0])
 
-        ellipse1 = mpatches.Ellipse(
-            (offset_x, offset_y),  # (x, y) center in pixels
-            width=bmaj_pix,  # total width (major axis)
-            height=bmin_pix,  # total height (minor axis)
-            angle=bpa,  # rotation angle in degrees
-            edgecolor="red",
-            facecolor="white",
-            alpha=1,
-            linestyle="solid",
-            lw=1.5,
-        )
-
-        return self.ax.add_patch(ellipse1)
+        beam.set_center((offset_x, offset_y))  # (x, y) center in pixels
+        beam.set_width(bmaj_pix)  # total width (major axis)
+        beam.set_height(bmin_pix)  # total height (minor axis)
+        beam.set_angle(bpa)  # rotation angle in degrees
+        return beam
 
     def add_sizebar(
         self, size_arcsec: float, distance_pc: float, pixscale_arcsec_per_pix: float
@@ -179,9 +207,9 @@ class AddPatches:
 
     def add_colorbar(
         self, fig=None, im=None, pos="top", orientation="horizontal", cbarlabel=False
-    ) -> None:
+    ):
         """
-        Add_colorbar
+        Add_colorbar, returns the colorbar. It follows later set_clim of im
 
         """
         import matplotlib.pyplot as plt
@@ -192,9 +220,8 @@ class AddPatches:
         divider = make_axes_locatable(ax)
         cax = divider.append_axes(pos, size="3%", pad=0)
         im.set_clim(vmax=np.nanmax(im.get_array()))
-        cbar = fig.colorbar(im, cax, orientation=orientation)
-        cbar.ax.xaxis.set_label_position(pos)
-        cbar.ax.xaxis.set_ticks_position(pos)
+        # Given to the colorbar (not to cbar.ax) so they survive its redraws
+        cbar = fig.colorbar(im, cax, orientation=orientation, ticklocation=pos)
         if cbarlabel:
             cbar.set_label("mJy beam$^{-1}$", fontsize=15, fontweight="bold")
 
@@ -204,7 +231,9 @@ class AddPatches:
             """
             return f"{x*1000:.1f}"
 
-        cbar.ax.xaxis.set_major_formatter(plt.FuncFormatter(format_func))
+        cbar.formatter = plt.FuncFormatter(format_func)
+        cbar.update_ticks()
         cbar.ax.tick_params(labelsize=14)  # Tick label size
         for label in cbar.ax.get_xticklabels():
             label.set_fontweight("bold")
+        return cbar
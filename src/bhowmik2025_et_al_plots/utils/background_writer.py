@@ -0,0 +1,155 @@
+"""
+Background writer of the encoded figures.
+The render loop used to wait for every file to be written (and linked into
+every group) before it went on with the next figure, and on a network
+filesystem the write latency is a good part of a disk. Here the render thread
+still encodes the figure (the templates are redrawn right after), but the
+bytes are handed to a small pool of threads that write them with
+save_bytes_to_groups, each file fsynced with its directory.
+The bytes waiting to be written are capped (max_pending_bytes): submit blocks
+while the pool is that far behind, so a slow filesystem slows the render loop
+down instead of filling the memory. Writes are grouped by a key (the disk):
+wait(key) returns once every figure of the key is on disk, so the build
+manifest only records a disk whose figures were written. With threads = 0 the
+figures are written right away in submit, as before.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .figure_writer import save_bytes_to_groups
+
+logger = logging.getLogger(__name__)
+
+# Encoded bytes allowed to wait for the writer threads
+MAX_PENDING_BYTES = 256 * 2**20
+
+
+class BackgroundWriter:
+    """
+    Pool of threads writing encoded figures to their group directories
+
+    Usage
+    -----
+    writer = BackgroundWriter(threads=2)
+    writer.submit(row.field, payload, name, base_dir, groups)
+    ...
+    writer.wait(row.field)  # {path: bytes} of the disk, once written
+    writer.close()
+    """
+
+    def __init__(self, threads: int = 2, max_pending_bytes: int = MAX_PENDING_BYTES):
+        self.threads = threads
+        self.max_pending_bytes = max_pending_bytes
+        self._pool = (
+            ThreadPoolExecutor(threads, thread_name_prefix="figure-writer")
+            if threads > 0
+            else None
+        )
+        self._room = threading.Condition()
+        self._pending_bytes = 0
+        # key -> [(future, bytes)], until wait(key)
+        self._writes: dict = {}
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes submitted and not written yet"""
+        return self._pending_bytes
+
+    def submit(
+        self, key: str, payload: bytes, image_name: str, base_dir: str, groups: list
+    ) -> None:
+        """
+        Write payload as image_name inside base_dir/group for every group, in
+        the background; blocks while max_pending_bytes are waiting already
+        """
+        if self._pool is None:
+            future = Future()
+            try:
+                future.set_result(
+                    save_bytes_to_groups(payload, image_name, base_dir, groups)
+                )
+            except Exception as err:
+                future.set_exception(err)
+            self._writes.setdefault(key, []).append((future, len(payload)))
+            return
+
+        size = len(payload)
+        with self._room:
+            # A figure larger than the cap still goes through on its own
+            self._room.wait_for(
+                lambda: not self._pending_bytes
+                or self._pending_bytes + size <= self.max_pending_bytes
+            )
+            self._pending_bytes += size
+        future = self._pool.submit(
+            save_bytes_to_groups,
+            payload,
+            image_name,
+            base_dir,
+            groups,
+            fsync=True,
+            disk=key,
+        )
+        future.add_done_callback(lambda _: self._release(size))
+        self._writes.setdefault(key, []).append((future, size))
+
+    def _release(self, size: int) -> None:
+        with self._room:
+            self._pending_bytes -= size
+            self._room.notify_all()
+
+    def done(self, key: str) -> bool:
+        """Whether every figure of key is written (or failed)"""
+        return all(future.done() for future, _ in self._writes.get(key, []))
+
+    def wait(self, key: str) -> dict:
+        """
+        Wait for the figures of key and forget them; raises the error of the
+        first one that failed
+
+        Returns
+        -------
+        dict
+            Bytes of every file written for key, by path.
+        """
+        sizes: dict = {}
+        for future, size in self._writes.pop(key, []):
+            for path in future.result():
+                sizes[path] = size
+        return sizes
+
+    def close(self) -> None:
+        """
+        Wait for every write left (errors are logged, the keys not waited for
+        are not recorded by anyone) and stop the threads
+        """
+        for key in list(self._writes):
+            try:
+                self.wait(key)
+            except Exception:
+                logger.exception("Figures of %s could not be written", key)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+# Writer of this process (the main process or a worker of the pool)
+_writers: dict = {}
+
+
+def get_writer(threads: int) -> BackgroundWriter:
+    """BackgroundWriter of this process with threads threads, made once"""
+    writer = _writers.get("writer")
+    if writer is None or writer.threads != threads:
+        if writer is not None:
+            writer.close()
+        writer = _writers["writer"] = BackgroundWriter(threads)
+    return writer
+
+
+def close_writer() -> None:
+    """Flush and stop the writer of this process, if any"""
+    writer = _writers.pop("writer", None)
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,209 @@
+"""
+Build manifest for incremental re-plotting.
+For every output figure it records a hash of everything the figure was made
+from (FITS files, frank profile, rows of full_table.csv and gap_ring_infl_pt.csv
+and the relevant PlotConfig fields), so plotter() can skip the disks whose
+outputs are still up to date.
+The code is part of the digest too: the source of every module of the package
+(code_files, all but those of CODE_EXCLUDED_DIRS) is hashed once per run, so
+editing any of them re-plots every disk. Taking them all, rather than the
+modules the renderer uses, means a new module cannot be forgotten; an edit to
+one that does not draw costs a re-plot, nothing worse.
+"""
+
+import hashlib
+import json
+import os
+
+from .feature_index import get_features
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "build_manifest.json"
+
+# Directories of the package without modules making figures (the benchmarks,
+# and the default places of the inputs and outputs)
+CODE_EXCLUDED_DIRS = ("bench", "input_files", "outputs")
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def code_files(package_dir: str = PACKAGE_DIR) -> list:
+    """
+    Sources of the modules of the package (relative to it, sorted), but those of
+    CODE_EXCLUDED_DIRS
+    """
+    names = []
+    for root, dirs, files in os.walk(package_dir):
+        dirs[:] = [
+            name
+            for name in dirs
+            if name not in CODE_EXCLUDED_DIRS and not name.startswith((".", "__"))
+        ]
+        for name in files:
+            if name.endswith(".py"):
+                names.append(os.path.relpath(os.path.join(root, name), package_dir))
+    return sorted(names)
+
+
+# PlotConfig fields changing how a figure looks
+CFG_FIELDS = (
+    "im_type",
+    "data_res_type",
+    "flux_ordered",
+    "smooth",
+    "zoom_factor",
+    "dpi",
+    "data_res",
+    "variants",
+)
+# PlotConfig fields changing how a figure looks only when they are set, so the
+# digests of the figures made before they existed stay valid
+OPTIONAL_CFG_FIELDS = ("raster_dpi", "max_bytes")
+
+
+class BuildManifest:
+    """
+    Json file mapping output paths to the digest of their inputs.
+    File digests are memoized by (size, mtime) so unchanged inputs are only
+    hashed once.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.files: dict = {}
+        self.outputs: dict = {}
+        self._code_digest: str = None
+        if os.path.exists(path):
+            with open(path, mode="r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content.get("version") == MANIFEST_VERSION:
+                self.files = content.get("files", {})
+                self.outputs = content.get("outputs", {})
+
+    def file_digest(self, path: str) -> str:
+        """
+        blake2b of the content of path, reusing the stored one if size and mtime
+        did not change
+        """
+        stat = os.stat(path)
+        known = self.files.get(path)
+        if (
+            known
+            and known["size"] == stat.st_size
+            and known["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return known["digest"]
+
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, mode="rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.files[path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": digest,
+        }
+        return digest
+
+    def code_digest(self) -> str:
+        """
+        Digest of the sources of the package (code_files), computed once per
+        manifest, so a change in the code also triggers a rebuild
+        """
+        if self._code_digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            for name in code_files():
+                h.update(name.encode())
+                h.update(self.file_digest(os.path.join(PACKAGE_DIR, name)).encode())
+            self._code_digest = h.hexdigest()
+        return self._code_digest
+
+    def disk_digest(self, cfg, row) -> str:
+        """
+        Digest of all the inputs of one disk (a row of cfg.subset)
+
+        Parameters
+        ----------
+        cfg : PlotConfig
+        row : namedtuple
+            Row of full_table used for the disk.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for path in (
+            row.path_data,
+            row.path_model,
+            row.path_avg_data,
+            row.path_residual,
+            row.path_rad,
+        ):
+            h.update(self.file_digest(path).encode())
+        h.update(self.code_digest().encode())
+
+        h.update(repr(tuple(row)).encode())
+        labels, radii = get_features(cfg.feature_index, row.field)
+        h.update("\x1f".join(labels).encode())
+        h.update(radii.tobytes())
+
+        for field in CFG_FIELDS:
+            h.update(f"{field}={getattr(cfg, field, None)!r}".encode())
+        for field in OPTIONAL_CFG_FIELDS:
+            if getattr(cfg, field, None) is not None:
+                h.update(f"{field}={getattr(cfg, field)!r}".encode())
+        for case, names in sorted(cfg.special_cases.items()):
+            h.update(f"{case}={row.field in names}".encode())
+
+        return h.hexdigest()
+
+    def is_current(self, outputs: list, digest: str) -> bool:
+        """
+        True if every output exists and was built from inputs with this digest
+        """
+        return bool(outputs) and all(
+            self.outputs.get(out) == digest and os.path.exists(out) for out in outputs
+        )
+
+    def record(self, outputs: list, digest: str) -> None:
+        """
+        Store the digest of freshly saved outputs
+        """
+        for out in outputs:
+            self.outputs[out] = digest
+
+    def restricted(self, path: str, outputs: list) -> "BuildManifest":
+        """
+        Manifest saved to path with only the given outputs (the ones of a
+        shard, see utils.sharding), sharing the file digests of this one
+        """
+        manifest = BuildManifest.__new__(BuildManifest)
+        manifest.path = path
+        manifest.files = dict(self.files)
+        manifest._code_digest = self._code_digest
+        manifest.outputs = {
+            out: self.outputs[out] for out in outputs if out in self.outputs
+        }
+        return manifest
+
+    def merge(self, other: "BuildManifest") -> None:
+        """
+        Take the file digests and outputs of other (e.g. a shard manifest)
+        """
+        self.files.update(other.files)
+        self.outputs.update(other.outputs)
+
+    def save(self) -> None:
+        """
+        Atomically write the manifest
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "files": self.files,
+                    "outputs": self.outputs,
+                },
+                f,
+                indent=1,
+            )
+        os.replace(tmp_path, self.path)
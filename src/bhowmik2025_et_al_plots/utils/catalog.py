@@ -0,0 +1,236 @@
+"""
+Single-pass index of the input files of the catalog.
+table_creator listed fits_files, frank_profiles and spec_avg_data_residual one
+after the other, with the same ODISEA / RA / other branch in each loop, and
+paired the files with four merges. Here every directory is scanned once with
+os.scandir, each file name goes through the compiled rules of FILE_RULES
+(field of the disk and kind of file) and the paths end in one index keyed by
+the normalized field (stripped, lower case): a disk with one file of every
+kind is a row of table_paths.csv.
+The listings (names, sizes, mtimes) also give a signature of the inputs:
+CatalogManifest keeps the one full_table.csv was built from, so table_creator
+can leave it as it is when nothing changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rules or the columns of the table change
+CATALOG_VERSION = 1
+CATALOG_MANIFEST_FILE = "catalog_manifest.json"
+
+_UNDERSCORES = re.compile(r"_+")
+
+# Kind of file: column of table_paths.csv (in its order)
+PATH_COLUMNS = {
+    "data": "path_data",
+    "rad": "path_rad",
+    "avg_data": "path_avg_data",
+    "model": "path_model",
+    "residual": "path_residual",
+}
+
+
+@dataclass(frozen=True)
+class FileRule:
+    """
+    Files of one directory (an attribute of PathUtils) ending in suffix; their
+    kind is marked_kind when marker is in the name, kind otherwise
+    """
+
+    directory: str
+    suffix: str
+    kind: str
+    marker: str = None
+    marked_kind: str = None
+
+    def kind_of(self, name: str) -> str:
+        """Kind of the file called name"""
+        if self.marker is not None and self.marker in name:
+            return self.marked_kind
+        return self.kind
+
+
+FILE_RULES = (
+    FileRule("fits_dir", ".fits", "data", marker="frank", marked_kind="model"),
+    FileRule("radial_prof_dir", ".txt", "rad"),
+    FileRule(
+        "data_res_dir", ".fits", "avg_data", marker="residual", marked_kind="residual"
+    ),
+)
+
+
+def source_field(name: str) -> str:
+    """
+    Field of a file name, as written in it: the first 3 words (separated by
+    underscores) of ODISEA files, the first one of RA files, else the first 2
+    """
+    ### YOU NEED TO CHECK IF THE NEXT CONDITIONS ARE CORRECT BY
+    ### COMPARING THE TABLES (NUMBER OF ROWS)####
+    if "ODISEA" in name:
+        count = 3
+    elif "RA" in name:
+        count = 1
+    else:
+        count = 2
+    return "_".join(_UNDERSCORES.split(name)[:count])
+
+
+def normalize_field(field: str) -> str:
+    """Field as in full_table (stripped, lower case)"""
+    return field.strip().lower()
+
+
+@dataclass(frozen=True)
+class CatalogFile:
+    """One input file of the catalog"""
+
+    field: str  # as written in the file name
+    kind: str  # key of PATH_COLUMNS
+    path: str
+    size: int
+    mtime_ns: int
+
+
+def scan_directory(directory: str, rule: FileRule) -> list:
+    """CatalogFiles of directory matching rule, in a single os.scandir pass"""
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(rule.suffix) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            files.append(
+                CatalogFile(
+                    field=source_field(entry.name),
+                    kind=rule.kind_of(entry.name),
+                    path=os.path.join(directory, entry.name),
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                )
+            )
+    return files
+
+
+class CatalogIndex:
+    """
+    Files of the catalog by normalized field and kind
+
+    Usage
+    -----
+    index = CatalogIndex.scan(paths)
+    table_paths = index.table()  # one row per complete disk
+    index.signature()  # changes with any file added, removed or modified
+    """
+
+    def __init__(self, files: list) -> None:
+        self.files = files
+        self.fields: dict = {}
+        for item in files:
+            kinds = self.fields.setdefault(normalize_field(item.field), {})
+            kinds.setdefault(item.kind, []).append(item)
+
+    @classmethod
+    def scan(cls, paths, rules: tuple = FILE_RULES) -> "CatalogIndex":
+        """Index of the directories of paths (a PathUtils) given by rules"""
+        files = []
+        for rule in rules:
+            files.extend(scan_directory(getattr(paths, rule.directory), rule))
+        return cls(files)
+
+    def signature(self) -> str:
+        """Digest of the names, sizes and mtimes of every file"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(CATALOG_VERSION).encode())
+        for item in sorted(self.files, key=lambda item: item.path):
+            h.update(repr((item.path, item.size, item.mtime_ns)).encode())
+        return h.hexdigest()
+
+    def incomplete(self) -> dict:
+        """Kinds of file missing, by field, of the fields without all of them"""
+        return {
+            field: sorted(set(PATH_COLUMNS) - set(kinds))
+            for field, kinds in self.fields.items()
+            if set(kinds) != set(PATH_COLUMNS)
+        }
+
+    def table(self):
+        """
+        table_paths: field and the path of every kind of file, one row per
+        field with all of them, in the order of the fields as written in the
+        data files. A field with two files of a kind is an error
+        """
+        import pandas as pd
+
+        rows = []
+        for field, kinds in self.fields.items():
+            if set(kinds) != set(PATH_COLUMNS):
+                continue
+            duplicated = [kind for kind, items in kinds.items() if len(items) > 1]
+            if duplicated:
+                paths = [item.path for kind in duplicated for item in kinds[kind]]
+                raise ValueError(f"More than one file of {field} per kind: {paths}")
+            row = {"field": field}
+            row.update({PATH_COLUMNS[kind]: kinds[kind][0].path for kind in kinds})
+            rows.append((kinds["data"][0].field, row))
+
+        rows.sort(key=lambda item: item[0])
+        return pd.DataFrame(
+            [row for _, row in rows], columns=["field", *PATH_COLUMNS.values()]
+        )
+
+
+def file_state(path: str) -> list:
+    """[size, mtime_ns] of path, None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class CatalogManifest:
+    """
+    Json file with the signature of the inputs (CatalogIndex.signature and
+    table.csv) full_table.csv was built from, and the state of the tables
+    written, so an unchanged catalog is not built again
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.content: dict = {}
+        if os.path.exists(path):
+            with open(path, mode="r", encoding="utf-8") as f:
+                self.content = json.load(f)
+
+    def is_current(self, signature: str, sources: list, outputs: list) -> bool:
+        """
+        Whether outputs were built from the catalog of signature and the
+        sources files as they are now, and were not touched since
+        """
+        return (
+            self.content.get("version") == CATALOG_VERSION
+            and self.content.get("signature") == signature
+            and self.content.get("sources") == {p: file_state(p) for p in sources}
+            and self.content.get("outputs") == {p: file_state(p) for p in outputs}
+            and all(os.path.exists(path) for path in outputs)
+        )
+
+    def record(self, signature: str, sources: list, outputs: list) -> None:
+        """Store the state of the catalog, sources and outputs just built"""
+        self.content = {
+            "version": CATALOG_VERSION,
+            "signature": signature,
+            "sources": {path: file_state(path) for path in sources},
+            "outputs": {path: file_state(path) for path in outputs},
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump(self.content, f, indent=1)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,37 @@
+"""
+Crop an image to the visible part of an axis before it is drawn (see
+ImagePanel.show in utils.figure_templates).
+Agg resamples, and the pdf backend embeds, the whole array given to imshow even
+when set_xlim/set_ylim only show a small box of it. Cropping first and passing
+the matching extent keeps the pixel coordinates of the full array, so the
+limits and ticks set by FixTicks stay valid.
+"""
+
+import numpy as np
+
+# Pixels kept around the view, so no blank border appears at the edges
+CROP_MARGIN = 1
+
+
+def crop_to_view(data, xlim: tuple, ylim: tuple, margin: int = CROP_MARGIN) -> tuple:
+    """
+    Crop data to the pixels shown in xlim, ylim (pixel coordinates of data)
+
+    Returns
+    -------
+    cropped : np.ndarray
+        View of data holding the visible pixels plus margin.
+    extent : tuple
+        (left, right, bottom, top) to give to imshow with origin="lower".
+    """
+    data = np.asarray(data)
+    ny, nx = data.shape[-2:]
+    # pixel k covers [k - 0.5, k + 0.5]
+    x0 = max(int(np.floor(min(xlim) + 0.5)) - margin, 0)
+    x1 = min(int(np.floor(max(xlim) + 0.5)) + 1 + margin, nx)
+    y0 = max(int(np.floor(min(ylim) + 0.5)) - margin, 0)
+    y1 = min(int(np.floor(max(ylim) + 0.5)) + 1 + margin, ny)
+    x1, y1 = max(x1, x0), max(y1, y0)
+
+    extent = (x0 - 0.5, x1 - 0.5, y0 - 0.5, y1 - 0.5)
+    return data[..., y0:y1, x0:x1], extent
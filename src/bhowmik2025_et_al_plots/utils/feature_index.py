@@ -0,0 +1,48 @@
+"""
+Index of the annotated features (gap_ring_infl_pt.csv) by target.
+plot_disk used to filter the whole features table for every disk and, for every
+label, filter it again to find its radius. index_features goes through the
+table once in load_variables and keeps, for each target, its labels already
+sorted by feature number and their radii as numpy arrays, so the radial profile
+panel draws its lines without any pandas call.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Colour and linestyle of each kind of feature (first letter of its label):
+# D = dark ring (gap), B = bright ring, I = inflection point
+FEATURE_STYLES = {
+    "D": ("b", "dotted"),
+    "B": ("r", "dashed"),
+    "I": ("g", "dashdot"),
+}
+
+_EMPTY = (np.array([], dtype=str), np.array([], dtype=float))
+
+
+def index_features(features_data: pd.DataFrame) -> dict:
+    """
+    Map each Target of features_data (columns Target, D/B, R) to
+    (labels, radii_au) arrays sorted by feature number (the number after the
+    "-" of the label, e.g. 2 for D-2).
+    A label given twice for a target takes the radius of its first row.
+    """
+    features = features_data.dropna(subset=["D/B"])
+    index: dict = {}
+    for target, group in features.groupby("Target", sort=False):
+        labels = group["D/B"].astype(str).to_numpy()
+        first_radius: dict = {}
+        for label, radius in zip(labels, group["R"].to_numpy(dtype=float)):
+            first_radius.setdefault(label, radius)
+
+        numbers = [int(label.split("-")[1]) for label in labels]
+        labels = labels[np.argsort(numbers, kind="stable")]
+        radii = np.array([first_radius[label] for label in labels], dtype=float)
+        index[target] = (labels, radii)
+    return index
+
+
+def get_features(feature_index: dict, target: str) -> tuple:
+    """(labels, radii_au) of target, empty arrays if it has no features"""
+    return feature_index.get(target, _EMPTY)
@@ -0,0 +1,233 @@
+"""
+Figures of a layout, drawn through the artists made when they were built.
+Each plotter builds one FigureTemplate per layout and only updates the artists
+for a disk: image data and extent, colour limits, axis limits, ticks, texts and
+the beam ellipse. The radial profile panels, whose number of artists changes
+from one disk to the other, are emptied with reset_profile_axis and drawn again.
+Once a figure is encoded its texts keep the renderer of the encode, and with it
+the raster layers at the dpi of the file (hundreds of MiB at 600 dpi), so the
+template is released right after (release_template) and built again, in a few
+ms, for the next disk.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import rcParams, ticker
+
+from .add_patches import AddPatches
+from .crop_view import CROP_MARGIN, crop_to_view
+
+# Templates of this process, by layout
+_templates: dict = {}
+
+
+def get_template(layout: str, builder):
+    """
+    Template of layout, made by builder() the first time it is asked for in
+    this process
+    """
+    if layout not in _templates:
+        _templates[layout] = builder()
+    template = _templates[layout]
+    template.restore_layout()
+    return template
+
+
+def release_template(layout: str) -> None:
+    """
+    Close the figure of the template of layout, if there is one
+    """
+    template = _templates.pop(layout, None)
+    if template is not None:
+        plt.close(template.fig)
+
+
+def close_templates() -> None:
+    """
+    Close the figures of every template of this process
+    """
+    for template in _templates.values():
+        plt.close(template.fig)
+    _templates.clear()
+
+
+def close_stray_figures() -> int:
+    """
+    Close every figure of this process that is not a template (left open by a
+    draw function or an exception) and return how many there were
+    """
+    kept = {template.fig.number for template in _templates.values()}
+    stray = [number for number in plt.get_fignums() if number not in kept]
+    for number in stray:
+        plt.close(number)
+    return len(stray)
+
+
+def _reset_ticks(ax) -> None:
+    """
+    Back to the default tick locators and formatters (undo set_xticks([]) & co)
+    """
+    for axis in (ax.xaxis, ax.yaxis):
+        axis.set_major_locator(ticker.AutoLocator())
+        axis.set_major_formatter(ticker.ScalarFormatter())
+
+
+def reset_profile_axis(ax) -> None:
+    """
+    Remove the lines, spans, texts and legend of the previous disk from a radial
+    profile axis, keeping its labels, tick parameters and position
+    """
+    for artist in [*ax.lines, *ax.collections, *ax.texts, *ax.patches]:
+        artist.remove()
+    if ax.get_legend() is not None:
+        ax.get_legend().remove()
+    ax.relim()
+    ax.set_autoscale_on(True)
+    _reset_ticks(ax)
+    ax.set_facecolor(rcParams["axes.facecolor"])
+
+
+class FigureTemplate:
+    """
+    Figure of a layout and its panels (ImagePanel or plain axes), by name
+
+    Usage
+    -----
+    template = FigureTemplate(fig, data=ImagePanel(fig, ax0), profile=ax1)
+    template["data"].show(array)
+    """
+
+    def __init__(self, fig, **panels) -> None:
+        self.fig = fig
+        self.panels = panels
+        # Constrained layout starts from the current positions, so every disk
+        # starts from the ones of the new figure to get the same result
+        self.positions = [
+            (ax, ax.get_position(original=True).frozen()) for ax in fig.axes
+        ]
+
+    def restore_layout(self) -> None:
+        """Put the axes back where they were when the figure was built"""
+        if self.fig.get_layout_engine() is None:
+            return
+        for ax, position in self.positions:
+            # set_position takes the axis out of the layout, put it back in
+            ax.set_position(position, which="both")
+            ax.set_in_layout(True)
+
+    def __getitem__(self, panel: str):
+        return self.panels[panel]
+
+
+class ImagePanel:
+    """
+    Axis showing an image, with the beam, texts and colorbar of AddPatches
+    made once and updated for every disk
+    """
+
+    def __init__(
+        self,
+        fig,
+        ax,
+        beam: bool = False,
+        name_text: bool = False,
+        flux_text: bool = False,
+        type_text: str = None,
+        colorbar: bool = False,
+        cbarlabel: bool = False,
+        **imshow_kwargs,
+    ) -> None:
+        self.fig = fig
+        self.ax = ax
+        self.patcher = AddPatches(ax)
+
+        imshow_kwargs.setdefault("origin", "lower")
+        # Placeholder, replaced by show()
+        self.image = ax.imshow(np.arange(4.0).reshape(2, 2), **imshow_kwargs)
+
+        self.beam = self.patcher.add_beam(1, 1, 0, 1) if beam else None
+        self.name_text = self.patcher.add_name_text(name="") if name_text else None
+        self.flux_text = self.patcher.add_flux_text(flux=0) if flux_text else None
+        self.type_text = (
+            self.patcher.add_type_text(text=type_text) if type_text else None
+        )
+        self.colorbar = (
+            self.patcher.add_colorbar(fig, self.image, cbarlabel=cbarlabel)
+            if colorbar
+            else None
+        )
+
+    def reset(self) -> None:
+        """
+        Undo what the special cases of the previous disk changed
+        """
+        self.image.set_visible(True)
+        if self.type_text is not None:
+            self.type_text.set_visible(True)
+        _reset_ticks(self.ax)
+        self.ax.set_facecolor(rcParams["axes.facecolor"])
+
+    def set_view(self, xlim: tuple, ylim: tuple) -> None:
+        """Limits of the axis, in pixels of the image given to show()"""
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+
+    def show(
+        self,
+        data,
+        vmin=None,
+        vmax=None,
+        margin: int = CROP_MARGIN,
+        origin: tuple = (0, 0),
+    ):
+        """
+        Show the part of data inside the current limits (set them, and the
+        ticks, before). Like imshow, missing vmin/vmax are the finite min/max
+        of what is shown; with a colorbar, a missing vmax is the peak shown
+        (as AddPatches.add_colorbar does). origin is the pixel (x0, y0) of
+        data[0, 0] in the coordinates of the limits, for a window of a larger
+        image whose axis keeps the pixels of the full image
+        """
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+        x0, y0 = origin
+        cropped, (left, right, bottom, top) = crop_to_view(
+            data,
+            (xlim[0] - x0, xlim[1] - x0),
+            (ylim[0] - y0, ylim[1] - y0),
+            margin,
+        )
+        self.image.set_data(cropped)
+        self.image.set_extent((left + x0, right + x0, bottom + y0, top + y0))
+
+        if vmin is None:
+            vmin = np.nanmin(cropped)
+        if vmax is None:
+            vmax = np.nanmax(cropped)
+        self.image.set_clim(vmin, vmax)
+
+        # set_extent may autoscale, keep the limits of the caller
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+        return self.image
+
+    def show_empty(self, shape: tuple) -> None:
+        """
+        Hide the image, with the limits imshow gives to an empty image of shape
+        (as ax.imshow(nan_matrix) did)
+        """
+        self.image.set_visible(False)
+        self.ax.set_xlim(-0.5, shape[1] - 0.5)
+        self.ax.set_ylim(shape[0] - 0.5, -0.5)
+
+    def set_texts(self, name: str = None, flux: float = None) -> None:
+        """Update the name and flux texts"""
+        if self.name_text is not None and name is not None:
+            self.name_text.set_text(name.replace("_", " ").upper())
+        if self.flux_text is not None and flux is not None:
+            self.flux_text.set_text(f"{flux:.2f} mJy")
+
+    def set_beam(
+        self, bmaj: float, bmin: float, bpa: float, pixscale_arcsec_per_pix: float
+    ) -> None:
+        """Place the beam for the current limits (set them before)"""
+        self.patcher.update_beam(self.beam, bmaj, bmin, bpa, pixscale_arcsec_per_pix)
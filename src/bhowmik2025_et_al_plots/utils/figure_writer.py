@@ -0,0 +1,148 @@
+"""
+Save a figure once and place it in every group directory it belongs to.
+Encoding a 600 dpi pdf is the most expensive step of the plotter, so the figure
+is rendered a single time into memory and the bytes are written to the first
+group. Other groups get a hard link (or a reflink) to that file when the
+filesystem allows it, or a plain copy of the bytes otherwise.
+With fsync, the files and their directories are flushed to the device before
+save_bytes_to_groups returns (used by the background writer, see
+utils.background_writer).
+"""
+
+import io
+import logging
+import os
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ioctl request number of FICLONE (linux/fs.h) to reflink a whole file
+_FICLONE = 0x40049409
+# Lowest resolution a byte budget may bring the raster layers of a figure to
+MIN_BUDGET_DPI = 72
+
+
+def encode_figure(fig, fmt: str, dpi: int) -> bytes:
+    """
+    Render fig into an in-memory buffer and return the encoded bytes
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches="tight", dpi=dpi)
+    return buffer.getvalue()
+
+
+def encode_within_budget(fig, fmt: str, dpi: int, max_bytes: int = None) -> bytes:
+    """
+    encode_figure, at a lower dpi if the figure does not fit in max_bytes.
+    The raster layers (images, rasterized artists) are what grows with dpi;
+    their bytes go as dpi**2, so each try aims just below the budget
+    """
+    payload = encode_figure(fig, fmt=fmt, dpi=dpi)
+    while max_bytes and len(payload) > max_bytes and dpi > MIN_BUDGET_DPI:
+        target = dpi * 0.95 * (max_bytes / len(payload)) ** 0.5
+        dpi = max(MIN_BUDGET_DPI, min(int(target), int(dpi * 0.9)))
+        payload = encode_figure(fig, fmt=fmt, dpi=dpi)
+    if max_bytes and len(payload) > max_bytes:
+        logger.warning(
+            "%s figure of %d bytes over the budget of %d bytes even at %d dpi",
+            fmt,
+            len(payload),
+            max_bytes,
+            dpi,
+        )
+    return payload
+
+
+def _write_bytes(path: str, payload: bytes, fsync: bool = False) -> None:
+    """
+    Atomically write payload to path (replacing, not truncating, older files,
+    which may be hard links shared with other groups)
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode="wb") as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _fsync_dir(directory: str) -> None:
+    """Flush the entries (new names, renames) of directory, where supported"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """
+    Try to clone src into dst with the FICLONE ioctl (btrfs, xfs, ...)
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, mode="rb") as f_src, open(dst, mode="wb") as f_dst:
+            fcntl.ioctl(f_dst.fileno(), _FICLONE, f_src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def _link_or_write(src: str, dst: str, payload: bytes, fsync: bool = False) -> None:
+    """
+    Place the already written src at dst: hard link, reflink or a copy of payload
+    """
+    tmp_path = dst + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        if not _reflink(src, tmp_path):
+            _write_bytes(dst, payload, fsync=fsync)
+            return
+    os.replace(tmp_path, dst)
+
+
+def save_bytes_to_groups(
+    payload: bytes,
+    image_name: str,
+    base_dir: str,
+    groups: list,
+    fsync: bool = False,
+    disk: str = None,
+) -> list:
+    """
+    Save an already encoded figure (see encode_within_budget) as image_name
+    inside base_dir/group for every group: written to the first group, linked
+    (or copied) into the others; with fsync, durably (files and directories
+    flushed to the device). disk labels the span of the write when it does not
+    run on the render thread
+    """
+    saved_paths: list = []
+    with span("write", disk=disk):
+        for group in groups:
+            save_dir = os.path.join(base_dir, group)
+            os.makedirs(save_dir, exist_ok=True)
+            save_path = os.path.join(save_dir, image_name)
+            if saved_paths:
+                _link_or_write(saved_paths[0], save_path, payload, fsync=fsync)
+            else:
+                _write_bytes(save_path, payload, fsync=fsync)
+            if fsync:
+                _fsync_dir(save_dir)
+            saved_paths.append(save_path)
+
+    return saved_paths
@@ -0,0 +1,208 @@
+"""
+Per-disk bundle of FITS images, shared by every figure of the disk.
+The 4-panel figure and the data - residual figure both need the avg_data and
+residual images of a disk; each figure used to open and decode them again.
+A DiskBundle opens each file of the disk once, keeps its header and the windows
+already read, and serves a smaller window as a slice of a larger one.
+Bundles are kept in a per-process LRU bounded by the bytes of their pixels, so
+rendering the same disk again (another figure variant) costs no I/O. The
+cache is shared by the render thread and the read-ahead threads (see
+utils.read_ahead), so it is guarded by a lock, and so is the file of every
+image (the cache may close it while a read-ahead thread reads it).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from .fits_window import FitsWindow, window_bounds
+
+# Bytes of pixels kept by the bundles of one process
+BUNDLE_CACHE_BYTES = 256 * 2**20
+
+
+class CachedImage:
+    """
+    One FITS image of a bundle, with the interface of FitsWindow (header,
+    shape, window_bounds, read_window). The file is opened on first use and
+    stays open until the bundle is closed
+    """
+
+    def __init__(self, path: str, on_read: Callable = None) -> None:
+        self.path = path
+        # Called after a new window is read (BundleCache.evict)
+        self._on_read = on_read
+        self._fits = None
+        self._header = None
+        # ((x0, x1, y0, y1), data) of the windows read
+        self._windows: list = []
+        self._lock = threading.RLock()
+
+    def _open(self) -> FitsWindow:
+        if self._fits is None:
+            self._fits = FitsWindow(self.path).__enter__()
+        return self._fits
+
+    def close(self) -> None:
+        """Close the file, keeping the header and the windows read"""
+        with self._lock:
+            if self._fits is not None:
+                self._fits.__exit__(None, None, None)
+                self._fits = None
+
+    @property
+    def header(self):
+        """Header of the image HDU"""
+        if self._header is None:
+            with self._lock:
+                self._header = self._open().header
+        return self._header
+
+    @property
+    def shape(self) -> tuple:
+        """(ny, nx) of the image"""
+        return self.header["NAXIS2"], self.header["NAXIS1"]
+
+    @property
+    def pixel_scale(self) -> float:
+        """arcsec / pixel"""
+        return self.header["CDELT2"] * 3600
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the windows held"""
+        return sum(data.nbytes for _, data in self._windows)
+
+    def window_bounds(self, center_pix, radius_pix: float, margin: int = 0) -> tuple:
+        """Same as FitsWindow.window_bounds"""
+        return window_bounds(self.shape, center_pix, radius_pix, margin)
+
+    def read_window(self, center_pix, radius_pix: float, margin: int = 0) -> tuple:
+        """
+        Same as FitsWindow.read_window, as a read-only array. A window inside
+        one already read is a view of it, with no I/O
+        """
+        x0, x1, y0, y1 = self.window_bounds(center_pix, radius_pix, margin)
+        with self._lock:
+            for (bx0, bx1, by0, by1), data in self._windows:
+                if bx0 <= x0 and x1 <= bx1 and by0 <= y0 and y1 <= by1:
+                    window = data[..., y0 - by0 : y1 - by0, x0 - bx0 : x1 - bx0]
+                    return window, (x0, y0)
+
+            data = self._open().read_bounds(x0, x1, y0, y1)
+            data.setflags(write=False)
+            self._windows.append(((x0, x1, y0, y1), data))
+        # Outside the lock of the image: evict takes the lock of the cache,
+        # then the ones of the images it closes
+        if self._on_read is not None:
+            self._on_read()
+        return data, (x0, y0)
+
+
+class DiskBundle:
+    """
+    The FITS images of one disk, by name (e.g. "avg_data")
+
+    Usage
+    -----
+    with get_bundle(row) as bundle:
+        data, (x0, y0) = bundle["avg_data"].read_window(center, radius)
+    """
+
+    def __init__(self, files: dict, on_read: Callable = None) -> None:
+        self.images = {name: CachedImage(path, on_read) for name, path in files.items()}
+
+    def __getitem__(self, name: str) -> CachedImage:
+        return self.images[name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the files; what was read stays available"""
+        for image in self.images.values():
+            image.close()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the pixels held"""
+        return sum(image.nbytes for image in self.images.values())
+
+
+class BundleCache:
+    """
+    Least recently used DiskBundles, evicted once their pixels take more than
+    max_bytes, when a bundle is asked for and when one reads a new window
+    (the bundle asked for or reading is never evicted; one held by a
+    DiskState read ahead may be, it then reopens its files if it reads again)
+    """
+
+    def __init__(self, max_bytes: int = BUNDLE_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.bundles: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, files: dict) -> DiskBundle:
+        """Bundle of files, made if it is not cached"""
+        with self._lock:
+            key = tuple(sorted(files.items()))
+            if key in self.bundles:
+                self.bundles.move_to_end(key)
+            else:
+                self.bundles[key] = DiskBundle(
+                    files, on_read=lambda: self.evict(keep=key)
+                )
+            self.evict(keep=key)
+            return self.bundles[key]
+
+    def evict(self, keep: tuple = None) -> None:
+        """
+        Drop the least recently used bundles, except the one of key keep,
+        until they fit in max_bytes. A dropped bundle only loses its files
+        (what it read stays with whoever holds it, e.g. a DiskState read
+        ahead)
+        """
+        with self._lock:
+            total = sum(bundle.nbytes for bundle in self.bundles.values())
+            for key in list(self.bundles):
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                bundle = self.bundles.pop(key)
+                bundle.close()
+                total -= bundle.nbytes
+
+    def clear(self) -> None:
+        """Close and drop every bundle"""
+        with self._lock:
+            for bundle in self.bundles.values():
+                bundle.close()
+            self.bundles.clear()
+
+
+# Bundles of this process
+_bundles = BundleCache()
+
+
+def get_bundle(row) -> DiskBundle:
+    """
+    Bundle of the FITS images of a row of full_table: data, model, avg_data
+    and residual
+    """
+    return _bundles.get(
+        {
+            "data": row.path_data,
+            "model": row.path_model,
+            "avg_data": row.path_avg_data,
+            "residual": row.path_residual,
+        }
+    )
+
+
+def close_bundles() -> None:
+    """Close and drop the bundles of this process"""
+    _bundles.clear()
@@ -0,0 +1,113 @@
+"""
+Read only the part of a FITS image that is shown in the figures.
+The header is read first, so the caller can work out the pixel box around the
+center (from the WCS and R_zoom) and only that window is read from disk, through
+the memory map / .section access of astropy. Compressed HDUs do not support
+partial reads efficiently and are read in full, then sliced.
+"""
+
+import numpy as np
+from astropy.io import fits
+
+
+def _image_hdu(hdul):
+    """First HDU holding an image (compressed images live in an extension)"""
+    return next(
+        (hdu for hdu in hdul if hdu.header.get("NAXIS", 0) >= 2),
+        hdul[0],
+    )
+
+
+def window_bounds(shape: tuple, center_pix, radius_pix: float, margin: int = 0):
+    """
+    Pixel box (x0, x1, y0, y1), end excluded, holding every pixel visible in
+    center +- radius_pix plus margin pixels, clipped to an image of shape (ny, nx)
+    """
+    ny, nx = shape
+    cen_x, cen_y = float(center_pix[0]), float(center_pix[1])
+    # pixel k covers [k - 0.5, k + 0.5]
+    x0 = max(int(np.floor(cen_x - radius_pix - 0.5)) - margin, 0)
+    x1 = min(int(np.floor(cen_x + radius_pix + 0.5)) + 1 + margin, nx)
+    y0 = max(int(np.floor(cen_y - radius_pix - 0.5)) - margin, 0)
+    y1 = min(int(np.floor(cen_y + radius_pix + 0.5)) + 1 + margin, ny)
+    return x0, max(x1, x0), y0, max(y1, y0)
+
+
+def read_image_header(path: str) -> fits.Header:
+    """Header of the image HDU of path, without reading the pixels"""
+    # Plain images: the primary header is enough, no HDUList needed
+    header = fits.Header.fromfile(path)
+    if header.get("NAXIS", 0) >= 2:
+        return header
+    with fits.open(path, memmap=True) as hdul:
+        return _image_hdu(hdul).header.copy()
+
+
+class FitsWindow:
+    """
+    Context manager around a memory mapped FITS file
+
+    Usage
+    -----
+    with FitsWindow(path) as fw:
+        pixel_scale = fw.header["CDELT2"] * 3600
+        data, (x0, y0) = fw.read_window((cen_x, cen_y), radius_pix)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.hdul = None
+        self.hdu = None
+
+    def __enter__(self):
+        self.hdul = fits.open(self.path, memmap=True)
+        self.hdu = _image_hdu(self.hdul)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.hdul.close()
+
+    @property
+    def header(self) -> fits.Header:
+        """Header of the image HDU"""
+        return self.hdu.header
+
+    @property
+    def shape(self) -> tuple:
+        """(ny, nx) of the image"""
+        return self.hdu.header["NAXIS2"], self.hdu.header["NAXIS1"]
+
+    def window_bounds(self, center_pix, radius_pix: float, margin: int = 0) -> tuple:
+        """
+        Pixel box (x0, x1, y0, y1), end excluded, holding every pixel visible in
+        center +- radius_pix plus margin pixels, clipped to the image
+        """
+        return window_bounds(self.shape, center_pix, radius_pix, margin)
+
+    def read_window(self, center_pix, radius_pix: float, margin: int = 0) -> tuple:
+        """
+        Read the pixels around center_pix (x, y in pixels, 0-based)
+
+        Returns
+        -------
+        data : np.ndarray
+            2D window of the image.
+        origin : tuple
+            (x0, y0) pixel of the full image at data[0, 0]. Subtract it from
+            any pixel coordinate of the full image to use it with data.
+        """
+        x0, x1, y0, y1 = self.window_bounds(center_pix, radius_pix, margin)
+        return self.read_bounds(x0, x1, y0, y1), (x0, y0)
+
+    def read_bounds(self, x0: int, x1: int, y0: int, y1: int) -> np.ndarray:
+        """Read the pixel box [y0:y1, x0:x1] of the image"""
+        # Degenerate (stokes / frequency) axes come first in numpy order
+        lead = (0,) * (self.hdu.header["NAXIS"] - 2)
+        window = lead + (slice(y0, y1), slice(x0, x1))
+
+        if isinstance(self.hdu, fits.CompImageHDU):
+            # copy, so the window does not keep the whole decompressed image
+            data = np.array(self.hdu.data[window])
+        else:
+            data = self.hdu.section[window]
+        return data
@@ -46,6 +46,15 @@ class FixTicks:
         ticks = np.arange(-n_ticks, n_ticks + 1) * tick_spacing
         return ticks
 
+    def get_view_radius(self, radius):
+        """
+        Half size of the view of ax0 after set_myticks, in the units of max_value.
+        matplotlib widens the limits to show every tick, so it is the largest of
+        radius (half size set with set_xlim) and the outermost tick
+        """
+        ticks = self.get_symmetric_ticks_with_zero()
+        return max(radius, float(np.max(np.abs(ticks))))
+
     def modify_ticks_and_labels_to_au(self, dist, pix_scale, cen_ra_pix, cen_dec_pix):
         """
         Returns both x and y tick positions (in pixels) and corresponding AU labels.
@@ -0,0 +1,157 @@
+"""
+Display statistics of every FITS image, computed once at ingestion.
+The colour limits of the panels (finite min / max, peak) used to be reduced
+from the pixel arrays for every panel of every figure. ImageStatsTable computes
+them once per image, with the rms and a few percentiles, and keeps them in a
+typed sidecar table (image_stats.csv, next to full_table.csv). Each row records
+the size and mtime of its file, so a changed image is measured again.
+The statistics are of the full image, as the colour limits were before the
+plotters read only the zoom window.
+"""
+
+import logging
+import os
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+from .fits_window import FitsWindow
+
+logger = logging.getLogger(__name__)
+
+STATS_FILE = "image_stats.csv"
+# Columns of full_table with the paths of the images
+IMAGE_COLUMNS = ("path_data", "path_model", "path_avg_data", "path_residual")
+PERCENTILES = (1, 5, 50, 95, 99)
+
+# Tables of this process, by directory
+_tables: dict = {}
+
+
+@dataclass(frozen=True)
+class ImageStats:
+    """Statistics of the pixels of one image"""
+
+    path: str
+    size: int
+    mtime_ns: int
+    finite_min: float
+    finite_max: float
+    peak: float
+    rms: float
+    p1: float
+    p5: float
+    p50: float
+    p95: float
+    p99: float
+
+
+# Column types of the sidecar table
+STATS_DTYPES = {
+    field.name: {str: str, int: "int64", float: "float64"}[field.type]
+    for field in fields(ImageStats)
+}
+
+
+def measure_image(path: str) -> ImageStats:
+    """Statistics of the full image of path"""
+    with FitsWindow(path) as fits_image:
+        ny, nx = fits_image.shape
+        data = np.asarray(fits_image.read_bounds(0, nx, 0, ny), dtype=float)
+    finite = data[np.isfinite(data)]
+    stat = os.stat(path)
+
+    if finite.size:
+        values = {
+            "finite_min": finite.min(),
+            "finite_max": finite.max(),
+            "rms": np.sqrt(np.mean(finite**2)),
+        }
+        percentiles = np.percentile(finite, PERCENTILES)
+    else:
+        values = dict.fromkeys(("finite_min", "finite_max", "rms"), np.nan)
+        percentiles = np.full(len(PERCENTILES), np.nan)
+    with np.errstate(invalid="ignore"):
+        # nanmax of an all-nan image is nan (with a warning we do not need)
+        peak = np.nanmax(data) if np.any(~np.isnan(data)) else np.nan
+
+    return ImageStats(
+        path=os.path.abspath(path),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        peak=float(peak),
+        **{key: float(value) for key, value in values.items()},
+        **{f"p{q}": float(value) for q, value in zip(PERCENTILES, percentiles)},
+    )
+
+
+def get_image_stats(directory: str) -> "ImageStatsTable":
+    """Table of directory, read once per process"""
+    if directory not in _tables:
+        _tables[directory] = ImageStatsTable(directory)
+    return _tables[directory]
+
+
+class ImageStatsTable:
+    """
+    image_stats.csv of directory, by image path
+
+    Usage
+    -----
+    table = get_image_stats(paths.input_dir).update_table(full_table)
+    vmax = table[row.path_data].peak
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.path = os.path.join(directory, STATS_FILE)
+        self.rows: dict = {}
+        if os.path.exists(self.path):
+            table = pd.read_csv(self.path, dtype=STATS_DTYPES)
+            if list(table.columns) == list(STATS_DTYPES):
+                for values in table.itertuples(index=False):
+                    row = ImageStats(*values)
+                    self.rows[row.path] = row
+
+    def is_current(self, path: str) -> bool:
+        """True if path was measured and did not change since"""
+        row = self.rows.get(os.path.abspath(path))
+        if row is None:
+            return False
+        stat = os.stat(path)
+        return row.size == stat.st_size and row.mtime_ns == stat.st_mtime_ns
+
+    def update_table(self, table: pd.DataFrame) -> "ImageStatsTable":
+        """update() with every image of the IMAGE_COLUMNS of table"""
+        return self.update(path for column in IMAGE_COLUMNS for path in table[column])
+
+    def update(self, image_files) -> "ImageStatsTable":
+        """Measure the new or changed images of image_files and save the table"""
+        stale = sorted(
+            {os.path.abspath(path) for path in image_files if not self.is_current(path)}
+        )
+        if stale:
+            for path in stale:
+                self.rows[path] = measure_image(path)
+            self.save()
+            logger.info("Measured the display statistics of %d images", len(stale))
+        return self
+
+    def __getitem__(self, path: str) -> ImageStats:
+        """
+        Statistics of path; an image missing from the table (or changed) is
+        measured, but only kept in memory
+        """
+        if not self.is_current(path):
+            self.rows[os.path.abspath(path)] = measure_image(path)
+        return self.rows[os.path.abspath(path)]
+
+    def save(self) -> None:
+        """Atomically write the table"""
+        table = pd.DataFrame(
+            [asdict(row) for _, row in sorted(self.rows.items())],
+            columns=list(STATS_DTYPES),
+        ).astype(STATS_DTYPES)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        table.to_csv(tmp_path, index=False, float_format="%.17g")
+        os.replace(tmp_path, self.path)
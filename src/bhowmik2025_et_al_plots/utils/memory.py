@@ -0,0 +1,149 @@
+"""
+Memory accounting of the render loop.
+Long runs used to grow in RSS until they had to be split by hand. For every
+disk, MemoryProbe records the resident set size after the disk, its growth
+during the disk, the number of figures left open besides the templates (closed
+right away, see figure_templates.close_stray_figures) and, when asked for, the
+peak of the Python allocations traced by tracemalloc (which slows the run
+down, so it is opt-in). When the resident set size after a disk is more than
+RSS_GROWTH_LIMIT above the one after the previous disk of the process, the
+probe runs its on_growth action (render_disk closes the templates and collects
+the closed figures), so the memory of a heavy disk is not carried into the rest
+of the run. memory_summary gives the high-water marks of a run.
+"""
+
+import os
+import resource
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass, fields
+from typing import Callable
+
+import pandas as pd
+
+# Growth of the resident set size from one disk to the next (bytes) above
+# which the probe runs its on_growth action
+RSS_GROWTH_LIMIT = 256 * 2**20
+
+# Resident set size after the last disk probed in this process (before its
+# on_growth action, which would otherwise make the next disk look like growth)
+_last_rss = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (its peak where /proc is missing)"""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Highest resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass(frozen=True)
+class DiskMemory:
+    """Memory of the process that rendered one disk"""
+
+    disk: str
+    pid: int
+    rss: int  # bytes, after the disk
+    rss_growth: int  # bytes, during the disk
+    peak_rss: int  # bytes, highest of the process so far
+    traced_peak: int  # bytes, peak of the Python allocations (-1: not traced)
+    stray_figures: int  # figures left open by the disk
+    released: bool = False  # whether the probe ran on_growth after the disk
+
+
+class MemoryProbe:
+    """
+    Memory of the disk rendered inside the block. on_growth() runs on exit when
+    the process grew by more than growth_limit bytes since the previous disk
+    (since the block, for the first one)
+
+    Usage
+    -----
+    with MemoryProbe(row.field, on_growth=release_memory) as probe:
+        plot_disk(cfg, count, row)
+        probe.stray_figures = close_stray_figures()
+    probe.result  # DiskMemory
+    """
+
+    def __init__(
+        self,
+        disk: str,
+        trace_python: bool = False,
+        on_growth: Callable = None,
+        growth_limit: int = RSS_GROWTH_LIMIT,
+    ) -> None:
+        self.disk = disk
+        self.trace_python = trace_python
+        self.on_growth = on_growth
+        self.growth_limit = growth_limit
+        self.stray_figures = 0
+        self.result = None
+        self._rss_before = 0
+
+    def __enter__(self):
+        if self.trace_python:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._rss_before = rss_bytes()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _last_rss
+        rss = rss_bytes()
+        traced_peak = tracemalloc.get_traced_memory()[1] if self.trace_python else -1
+        reference = self._rss_before if _last_rss is None else _last_rss
+        _last_rss = rss
+        released = self.on_growth is not None and rss - reference > self.growth_limit
+        if released:
+            self.on_growth()
+        self.result = DiskMemory(
+            disk=self.disk,
+            pid=os.getpid(),
+            rss=rss,
+            rss_growth=rss - self._rss_before,
+            peak_rss=peak_rss_bytes(),
+            traced_peak=traced_peak,
+            stray_figures=self.stray_figures,
+            released=released,
+        )
+
+
+def memory_table(records: list) -> pd.DataFrame:
+    """records (DiskMemory) as a table, one row per disk"""
+    return pd.DataFrame(
+        [asdict(record) for record in records],
+        columns=[field.name for field in fields(DiskMemory)],
+    )
+
+
+def memory_summary(records: list) -> dict:
+    """High-water marks of records, in MiB (and the disks where they were hit)"""
+    if not records:
+        return {}
+    mib = 2**20
+    table = memory_table(records)
+    summary = {
+        "peak_rss_mib": table["peak_rss"].max() / mib,
+        "max_rss_mib": table["rss"].max() / mib,
+        "max_rss_disk": table.loc[table["rss"].idxmax(), "disk"],
+        "max_growth_mib": table["rss_growth"].max() / mib,
+        "max_growth_disk": table.loc[table["rss_growth"].idxmax(), "disk"],
+        "stray_figures": int(table["stray_figures"].sum()),
+        "releases": int(table["released"].sum()),
+    }
+    if (table["traced_peak"] >= 0).any():
+        summary["traced_peak_mib"] = table["traced_peak"].max() / mib
+        summary["traced_peak_disk"] = table.loc[table["traced_peak"].idxmax(), "disk"]
+    return summary
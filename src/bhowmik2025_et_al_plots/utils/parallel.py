@@ -0,0 +1,66 @@
+"""
+Process pool used by plotter() to render several disks at the same time.
+Every row of cfg.subset is independent (its own FITS files, profile and output
+paths), so each worker renders whole disks on the Agg backend and streams the
+count of the finished disk back to the main process as soon as it is done.
+"""
+
+import multiprocessing as mp
+
+# State set once per worker by _init_worker, so cfg is only pickled once per
+# worker and not once per disk
+_worker_state: dict = {}
+
+
+def _init_worker(render, cfg) -> None:
+    """
+    Initializer of each worker: non-interactive backend + the rows to be plotted
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    _worker_state["render"] = render
+    _worker_state["cfg"] = cfg
+    _worker_state["rows"] = list(cfg.subset.itertuples(index=False))
+
+
+def _render_count(count: int):
+    """
+    Render the disk in position count of cfg.subset inside a worker
+    """
+    cfg = _worker_state["cfg"]
+    return _worker_state["render"](cfg, count, _worker_state["rows"][count])
+
+
+def imap_disks(render, cfg, counts, jobs: int, tasks_per_worker: int = 10):
+    """
+    Render the disks in counts across a pool of jobs processes.
+
+    Parameters
+    ----------
+    render : callable
+        Module level function render(cfg, count, row) plotting a single disk.
+    cfg : PlotConfig
+        Configuration returned by load_variables.
+    counts : iterable of int
+        Positions in cfg.subset to be rendered.
+    jobs : int
+        Number of worker processes.
+    tasks_per_worker : int
+        Disks rendered by a worker before it is replaced by a fresh one, which
+        bounds the memory slowly retained by matplotlib in long runs.
+
+    Yields
+    ------
+    The value returned by render for each disk, in order of completion.
+    """
+    # spawn instead of fork: matplotlib, tqdm and logging state must not be
+    # copied half-initialized into the workers
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(
+        processes=jobs,
+        initializer=_init_worker,
+        initargs=(render, cfg),
+        maxtasksperchild=tasks_per_worker,
+    ) as pool:
+        yield from pool.imap_unordered(_render_count, counts)
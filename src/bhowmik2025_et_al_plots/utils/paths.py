@@ -6,6 +6,9 @@ plots project and is imported in the utils module as paths
 import os
 import logging
 
+# Environment variable overriding the default root (the package directory)
+ROOT_ENV = "BHOWMIK2025_ROOT"
+
 
 class PathUtils:
     """
@@ -13,17 +16,48 @@ class PathUtils:
     """
 
     def __init__(self, root=None):
+        # Without root, the directories follow BHOWMIK2025_ROOT when they are
+        # used, not when the module holding this instance was imported
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        """Directory holding input_files and outputs"""
         utils_dir = os.path.dirname(os.path.abspath(__file__))
         base_path = os.path.dirname(utils_dir)  # Go one level up
         # base_path = os.path.dirname(os.path.abspath(__file__))
-        self.root = os.path.abspath(root) if root else base_path
+        # e.g. a synthetic dataset made by bench.synthetic
+        root = self._root or os.environ.get(ROOT_ENV)
         # self.root = os.path.abspath(root) if root else os.path.abspath(".")
-        self.input_dir = os.path.join(self.root, "input_files")
-        self.fits_dir = os.path.join(self.input_dir, "fits_files")
-        self.data_res_dir = os.path.join(self.fits_dir, "spec_avg_data_residual")
-        self.radial_prof_dir = os.path.join(self.input_dir, "frank_profiles")
-        self.output_dir = os.path.join(self.root, "outputs")
-        self.latex_dir = os.path.join(self.output_dir, "generated_figures_for_tex")
+        return os.path.abspath(root) if root else base_path
+
+    @property
+    def input_dir(self) -> str:
+        return os.path.join(self.root, "input_files")
+
+    @property
+    def fits_dir(self) -> str:
+        return os.path.join(self.input_dir, "fits_files")
+
+    @property
+    def data_res_dir(self) -> str:
+        return os.path.join(self.fits_dir, "spec_avg_data_residual")
+
+    @property
+    def radial_prof_dir(self) -> str:
+        return os.path.join(self.input_dir, "frank_profiles")
+
+    @property
+    def output_dir(self) -> str:
+        return os.path.join(self.root, "outputs")
+
+    @property
+    def latex_dir(self) -> str:
+        return os.path.join(self.output_dir, "generated_figures_for_tex")
+
+    @property
+    def cache_dir(self) -> str:
+        return os.path.join(self.output_dir, "cache")
 
     def __str__(self):
         return (
@@ -33,7 +67,8 @@ class PathUtils:
             + f"Data - Residuals Directory: {self.data_res_dir}\n"
             + f"Radial Profile Directory: {self.radial_prof_dir}\n"
             + f"Output Directory: {self.output_dir}\n"
-            + f"LaTeX Directory: {self.latex_dir}"
+            + f"LaTeX Directory: {self.latex_dir}\n"
+            + f"Cache Directory: {self.cache_dir}"
         )
 
     def __repr__(self):
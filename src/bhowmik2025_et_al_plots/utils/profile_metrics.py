@@ -0,0 +1,166 @@
+"""
+Enclosed-flux radii (R90, R95, ...) of the frank radial profiles, computed for
+the whole sample at once.
+The profiles are padded into 2D arrays (one row per disk) so that sorting, ring
+finding and the trapezoid integration run as single numpy operations. The
+results are stored as columns of full_table (R90_au, R95_au) by table_creator
+and read by the plotters.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .arc_to_au import arc_to_au
+
+# Enclosed-flux fractions stored in full_table
+FRACTIONS = (0.90, 0.95)
+# Peak threshold (fraction of the global peak) for a ring to be kept
+EPS_REL = 0.210
+
+
+def radius_column(p: float) -> str:
+    """Name of the full_table column of the radius enclosing a fraction p"""
+    return f"R{round(p * 100):d}_au"
+
+
+def load_profiles(profile_files, store=None) -> tuple:
+    """
+    Read the frank profiles (radius in arcsec, intensity) into padded arrays,
+    from the ProfileStore store if given, else from the text files
+
+    Returns
+    -------
+    r_arcsec, intensity : np.ndarray
+        (n_disks, max_length) arrays; rows are padded with their last radius
+        and with zero intensity.
+    lengths : np.ndarray
+        Number of valid points of each row.
+    """
+    if store is not None:
+        profiles = [store.get(path)[:2] for path in profile_files]
+    else:
+        profiles = [np.loadtxt(path, unpack=True)[:2] for path in profile_files]
+    lengths = np.array([len(prof[0]) for prof in profiles], dtype=int)
+    n_max = lengths.max() if len(lengths) else 0
+
+    r_arcsec = np.empty((len(profiles), n_max))
+    intensity = np.zeros((len(profiles), n_max))
+    for k, (r, flux) in enumerate(profiles):
+        r_arcsec[k, : lengths[k]] = r
+        r_arcsec[k, lengths[k] :] = r[-1]
+        intensity[k, : lengths[k]] = flux
+    return r_arcsec, intensity, lengths
+
+
+def enclosed_flux_radii(
+    r, intensity, lengths, fractions=FRACTIONS, eps_rel: float = EPS_REL
+) -> np.ndarray:
+    """
+    Radius enclosing each fraction of the flux, preserving rings, for every row
+
+    The profile beyond the last significant local maximum (peak >= eps_rel of
+    the global peak) is forced to decrease (running minimum), so noise in the
+    outer disk does not inflate the radii while the outermost real ring is
+    kept. The flux is integrated with annular weights (trapezoid).
+
+    Parameters
+    ----------
+    r : np.ndarray
+        (n, m) radii, any units, padded as in load_profiles.
+    intensity : np.ndarray
+        (n, m) surface brightness (normalization cancels).
+    lengths : np.ndarray
+        (n,) valid points of each row.
+    fractions : sequence of float
+        Enclosed-flux fractions, e.g. 0.90 for R90.
+
+    Returns
+    -------
+    np.ndarray
+        (n, len(fractions)) radii in the units of r, nan where undefined.
+    """
+    r = np.asarray(r, dtype=float)
+    intensity = np.asarray(intensity, dtype=float)
+    n, m = r.shape
+    cols = np.arange(m)
+    valid = cols[None, :] < np.asarray(lengths)[:, None]
+
+    # Sort each profile by radius (padding stays at the end)
+    order = np.argsort(np.where(valid, r, np.inf), axis=1, kind="stable")
+    r = np.take_along_axis(r, order, axis=1)
+    intensity = np.take_along_axis(intensity, order, axis=1)
+    # padding at the outermost radius, so it adds no area
+    r_out = r[np.arange(n), np.maximum(np.asarray(lengths) - 1, 0)]
+    r = np.where(valid, r, r_out[:, None])
+
+    intensity = np.nan_to_num(intensity, nan=0.0)
+    intensity[(intensity < 0) | ~valid] = 0.0
+    i_max = intensity.max(axis=1)
+
+    # ---- last significant local maximum ----
+    peaks = np.zeros((n, m), dtype=bool)
+    peaks[:, 1:-1] = (intensity[:, 1:-1] > intensity[:, :-2]) & (
+        intensity[:, 1:-1] > intensity[:, 2:]
+    )
+    peaks &= np.roll(valid, -1, axis=1) & valid  # interior points only
+    has_peak = peaks.any(axis=1)
+    significant = peaks & (intensity >= eps_rel * i_max[:, None])
+    has_significant = significant.any(axis=1)
+    last_significant = m - 1 - np.argmax(significant[:, ::-1], axis=1)
+    i_last = np.where(
+        has_peak & has_significant, last_significant, np.argmax(intensity, axis=1)
+    )
+
+    # ---- running minimum beyond it (keeps the real ring) ----
+    beyond = cols[None, :] > i_last[:, None]
+    running_min = np.minimum.accumulate(np.where(beyond, intensity, np.inf), axis=1)
+    suppressed = np.where(beyond, running_min, intensity)
+
+    # ---- enclosed flux with annular weight (trapezoid) ----
+    ann = 2.0 * np.pi * r * suppressed
+    cum = np.zeros((n, m))
+    cum[:, 1:] = np.cumsum(
+        0.5 * (ann[:, 1:] + ann[:, :-1]) * np.diff(r, axis=1), axis=1
+    )
+    total = cum[:, -1]
+
+    radii = np.full((n, len(fractions)), np.nan)
+    for k, p in enumerate(fractions):
+        target = p * total
+        # first point reaching the target, interpolated from the previous one
+        hi = np.clip((cum < target[:, None]).sum(axis=1), 1, m - 1)
+        lo = hi - 1
+        rows = np.arange(n)
+        c_lo, c_hi = cum[rows, lo], cum[rows, hi]
+        r_lo, r_hi = r[rows, lo], r[rows, hi]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.where(c_hi > c_lo, (target - c_lo) / (c_hi - c_lo), 0.0)
+        radii[:, k] = r_lo + frac * (r_hi - r_lo)
+
+    undefined = (i_max <= 0) | (total <= 0) | (np.asarray(lengths) < 2)
+    radii[undefined] = np.nan
+    return radii
+
+
+def add_profile_metrics(
+    table: pd.DataFrame, fractions=FRACTIONS, store=None
+) -> pd.DataFrame:
+    """
+    Add the R<p>_au columns (enclosed-flux radii in au) to a table with the
+    path_rad and Distance columns of full_table. Each profile is normalized to
+    its peak, as in the radial profile panel. The profiles are read from the
+    ProfileStore store if given
+    """
+    table = table.copy()
+    r_arcsec, intensity, lengths = load_profiles(table["path_rad"], store=store)
+    valid = np.arange(intensity.shape[1])[None, :] < lengths[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        intensity = intensity / np.nanmax(
+            np.where(valid, intensity, np.nan), axis=1, keepdims=True
+        )
+    r_au = r_arcsec * arc_to_au(table["Distance"].to_numpy(dtype=float))[:, None]
+
+    radii = enclosed_flux_radii(r_au, intensity, lengths, fractions=fractions)
+    for k, p in enumerate(fractions):
+        table[radius_column(p)] = radii[:, k]
+    return table
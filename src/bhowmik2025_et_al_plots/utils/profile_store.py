@@ -0,0 +1,205 @@
+"""
+Binary store of the frank radial profiles.
+Parsing the text profiles with np.loadtxt costs more than drawing the radial
+panel and is repeated on every run. The store packs every profile into a single
+(n_points, 3) float64 .npy file (columns r_arcsec, I, err) plus a json index
+with the offset, length, size and mtime of each source file. The .npy file is
+opened as a read-only memmap, so a profile is returned as zero-copy views.
+A profile whose text file changed (size or mtime) or is not in the store yet
+triggers a rebuild in update(), which reuses the rows of the unchanged
+profiles; get() only reads (such a profile is parsed, not stored), so the
+processes plotting the disks never write the store.
+The .npy file of a rebuild is named after its content and the index points to
+it, so replacing the index is the only step readers can observe: they never
+see the index of one rebuild with the profiles of another.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 2
+# frank_profiles.<digest of the content>.npy
+DATA_PREFIX = "frank_profiles"
+INDEX_FILE = "frank_profiles_index.json"
+# r_arcsec, I, err
+N_COLUMNS = 3
+
+# Stores opened by this process, by cache directory
+_stores: dict = {}
+
+
+def get_profile_store(cache_dir: str) -> "ProfileStore":
+    """
+    Store of cache_dir, opened once per process
+    """
+    if cache_dir not in _stores:
+        _stores[cache_dir] = ProfileStore(cache_dir)
+    return _stores[cache_dir]
+
+
+def read_profile_text(path: str) -> np.ndarray:
+    """
+    (n_points, 3) array of a frank profile text file; err is nan if the file
+    has only two columns
+    """
+    columns = np.loadtxt(path, ndmin=2)
+    profile = np.full((columns.shape[0], N_COLUMNS), np.nan)
+    n_cols = min(columns.shape[1], N_COLUMNS)
+    profile[:, :n_cols] = columns[:, :n_cols]
+    return profile
+
+
+class ProfileStore:
+    """
+    Frank profiles packed in cache_dir
+
+    Usage
+    -----
+    store = ProfileStore(paths.cache_dir).update(full_table["path_rad"])
+    r_arcsec, intensity, err = store.get(row.path_rad)
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.data_path = None
+        self.entries: dict = {}
+        self._data = None
+        self._load()
+
+    def _load(self) -> None:
+        """
+        Read the index and open the .npy file it points to; a rebuild in
+        another process may delete that file in between, then the new index
+        is read
+        """
+        for _ in range(3):
+            if not os.path.exists(self.index_path):
+                return
+            with open(self.index_path, mode="r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content.get("version") != STORE_VERSION:
+                return
+            data_path = os.path.join(self.cache_dir, content["data_file"])
+            try:
+                # An open memmap outlives the deletion of its file
+                self._data = np.load(data_path, mmap_mode="r")
+            except FileNotFoundError:
+                continue
+            self.data_path = data_path
+            self.entries = content.get("entries", {})
+            return
+
+    @property
+    def data(self) -> np.ndarray:
+        """Memmap of the packed profiles"""
+        if self._data is None:
+            self._data = np.load(self.data_path, mmap_mode="r")
+        return self._data
+
+    def is_current(self, path: str) -> bool:
+        """
+        True if the profile of path is stored and its file did not change
+        """
+        known = self.entries.get(os.path.abspath(path))
+        if known is None:
+            return False
+        stat = os.stat(path)
+        return known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns
+
+    def update(self, profile_files) -> "ProfileStore":
+        """
+        Make sure every file of profile_files is stored and current,
+        rebuilding the store if needed
+        """
+        profile_files = [os.path.abspath(path) for path in profile_files]
+        if not all(self.is_current(path) for path in profile_files):
+            self._rebuild(profile_files)
+        return self
+
+    def get(self, path: str) -> tuple:
+        """
+        (r_arcsec, I, err) of the profile of path, as read-only views; a
+        profile missing from the store (or changed) is parsed from its text
+        file, without writing the store
+        """
+        if not self.is_current(path):
+            logger.debug("Profile %s is not in the store, parsing it", path)
+            profile = read_profile_text(path)
+            return profile[:, 0], profile[:, 1], profile[:, 2]
+        known = self.entries[os.path.abspath(path)]
+        block = self.data[known["offset"] : known["offset"] + known["length"]]
+        return block[:, 0], block[:, 1], block[:, 2]
+
+    def _rebuild(self, profile_files: list) -> None:
+        """
+        Write the store again with the current profiles plus profile_files,
+        parsing only the new or changed text files
+        """
+        # Keep the stored profiles whose files still exist
+        wanted = [path for path in self.entries if os.path.exists(path)]
+        wanted += [path for path in profile_files if path not in self.entries]
+
+        blocks, entries, offset = [], {}, 0
+        n_parsed = 0
+        for path in wanted:
+            if self.is_current(path):
+                known = self.entries[path]
+                block = np.asarray(
+                    self.data[known["offset"] : known["offset"] + known["length"]]
+                )
+            else:
+                block = read_profile_text(path)
+                n_parsed += 1
+            stat = os.stat(path)
+            entries[path] = {
+                "offset": offset,
+                "length": len(block),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+            blocks.append(block)
+            offset += len(block)
+
+        packed = (
+            np.concatenate(blocks) if blocks else np.empty((0, N_COLUMNS), dtype=float)
+        )
+
+        # The data file first, under a new name, then the index pointing to it
+        os.makedirs(self.cache_dir, exist_ok=True)
+        digest = hashlib.blake2b(packed.tobytes(), digest_size=8).hexdigest()
+        data_path = os.path.join(self.cache_dir, f"{DATA_PREFIX}.{digest}.npy")
+        tmp_data = f"{data_path}.{os.getpid()}.tmp"
+        with open(tmp_data, mode="wb") as f:
+            np.save(f, packed)
+        os.replace(tmp_data, data_path)
+        tmp_index = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_index, mode="w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": STORE_VERSION,
+                    "data_file": os.path.basename(data_path),
+                    "entries": entries,
+                },
+                f,
+                indent=1,
+            )
+        os.replace(tmp_index, self.index_path)
+
+        # The previous data file stays open (memmap) wherever it was loaded
+        if self.data_path not in (None, data_path) and os.path.exists(self.data_path):
+            os.remove(self.data_path)
+        self.data_path = data_path
+        self._data = None
+        self.entries = entries
+        logger.info(
+            "Profile store rebuilt: %d profiles, %d parsed from text",
+            len(entries),
+            n_parsed,
+        )
@@ -0,0 +1,39 @@
+"""
+Read-ahead of the inputs of the next disks.
+The render loop read the frank profile and the FITS windows of a disk at the
+top of its iteration, and a cold read on the shared storage stalls it for
+hundreds of milliseconds. read_ahead runs the loads of the next items on a
+pool of threads while the current one is rendered; the loaded items wait in a
+queue of at most depth entries, which bounds the memory they hold.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def read_ahead(load, items, depth: int = 2):
+    """
+    (item, load(item)) of every item of items, in order, with load running on
+    depth threads up to depth items ahead of the consumer (depth = 0: load
+    runs in the loop, when the item is reached)
+    """
+    if depth < 1:
+        for item in items:
+            yield item, load(item)
+        return
+
+    with ThreadPoolExecutor(depth, thread_name_prefix="read-ahead") as pool:
+        queue: deque = deque()
+        try:
+            for item in items:
+                queue.append((item, pool.submit(load, item)))
+                if len(queue) > depth:
+                    item, future = queue.popleft()
+                    yield item, future.result()
+            while queue:
+                item, future = queue.popleft()
+                yield item, future.result()
+        finally:
+            # The consumer stopped early: drop the loads not started
+            for _, future in queue:
+                future.cancel()
@@ -0,0 +1,51 @@
+"""
+Deterministic split of a run across N independent processes or nodes.
+Every disk has a global rank, its position in full_table sorted (stably) by
+B8_Flux, which is also the number in front of its file names. Shard i of N
+renders the disks whose rank is i modulo N, so the shards are disjoint, cover
+the whole selection and get disks of every flux. Each shard writes its own
+build manifest, merged by the final step once every shard is complete.
+"""
+
+import os
+import re
+
+# Column of the subset with the global rank of each disk
+RANK_COLUMN = "rank"
+
+
+def parse_shard(text: str) -> tuple:
+    """(index, count) of "i/N", 0 <= i < N"""
+    try:
+        index, count = (int(value) for value in text.split("/"))
+    except ValueError as err:
+        raise ValueError(f"Shard must be given as i/N, not {text!r}") from err
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be in [0, {count}), not {index}")
+    return index, count
+
+
+def parse_disk_range(text: str) -> tuple:
+    """(first, last) global ranks of "first:last" (last excluded)"""
+    try:
+        first, last = (int(value) for value in re.split(r"[:,]", text))
+    except ValueError as err:
+        raise ValueError(
+            f"Disk range must be given as first:last, not {text!r}"
+        ) from err
+    if not 0 <= first < last:
+        raise ValueError(f"Disk range must have 0 <= first < last, not {text!r}")
+    return first, last
+
+
+def select_shard(table, shard: tuple):
+    """Rows of table (with RANK_COLUMN) rendered by shard (index, count)"""
+    index, count = shard
+    return table[table[RANK_COLUMN] % count == index]
+
+
+def shard_manifest_path(manifest_path: str, shard: tuple) -> str:
+    """Build manifest of shard, next to the one of the whole run"""
+    root, ext = os.path.splitext(manifest_path)
+    index, count = shard
+    return f"{root}.shard-{index}-of-{count}{ext}"
@@ -0,0 +1,115 @@
+"""
+Pixel centers of every disk of the subset, computed once in load_variables.
+Building a SkyCoord from sexagesimal strings and a WCS from a header has a
+large fixed cost per call, and plot_disk paid it for every disk and figure.
+Here all the centers of full_table are parsed into a single array-valued
+SkyCoord (FK5 J2000, as given in table.csv), WCS objects are cached by the WCS
+keywords of their header, and the centers are converted to pixels with one
+all_world2pix call per distinct WCS.
+The original data are in FK5 while spec_avg_data and the residuals are in ICRS
+(see info.txt): each center is transformed to the frame of the image (RADESYS)
+before going to pixels.
+"""
+
+import re
+
+import numpy as np
+from astropy import units as u
+from astropy.coordinates import SkyCoord
+from astropy.wcs import WCS
+from astropy.wcs.utils import wcs_to_celestial_frame
+
+from .fits_window import read_image_header
+
+# Header keywords defining a WCS
+WCS_KEYWORDS = re.compile(
+    r"^(NAXIS\d*|CTYPE\d|CRVAL\d|CRPIX\d|CDELT\d|CUNIT\d|CROTA\d|PC\d_\d|CD\d_\d"
+    r"|PV\d_\d+|PS\d_\d+|LONPOLE|LATPOLE|RADESYS|EQUINOX|EPOCH|MJD-OBS|DATE-OBS"
+    r"|WCSAXES|A_\w+|B_\w+|AP_\w+|BP_\w+)$"
+)
+
+# WCS of this process, by header signature
+_wcs_cache: dict = {}
+
+
+def header_signature(header) -> tuple:
+    """Hashable 80-character cards of the WCS keywords of header"""
+    # card.image is the raw text read from the file, no value parsing
+    return tuple(
+        card.image for card in header.cards if WCS_KEYWORDS.match(card.keyword)
+    )
+
+
+def get_wcs(header) -> WCS:
+    """WCS of header, made once per distinct set of WCS keywords"""
+    signature = header_signature(header)
+    if signature not in _wcs_cache:
+        _wcs_cache[signature] = WCS(header)
+    return _wcs_cache[signature]
+
+
+def parse_centers(center_x, center_y) -> SkyCoord:
+    """
+    Array-valued SkyCoord of the center_x (hourangle) / center_y (deg)
+    sexagesimal columns of full_table, in FK5 J2000
+    """
+    return SkyCoord(
+        ra=np.asarray(center_x, dtype=str),
+        dec=np.asarray(center_y, dtype=str),
+        unit=(u.hourangle, u.deg),
+        frame="fk5",
+        equinox="J2000.0",
+    )
+
+
+def center_pixels(coords: SkyCoord, headers: list) -> np.ndarray:
+    """
+    (n, 2) pixel (x, y), 0-based, of coords[k] on the image of headers[k]
+
+    The coordinates are transformed once per distinct celestial frame and
+    converted with one all_world2pix call per distinct WCS.
+    """
+    pixels = np.full((len(headers), 2), np.nan)
+    groups: dict = {}
+    for k, header in enumerate(headers):
+        groups.setdefault(header_signature(header), []).append(k)
+
+    in_frame: dict = {}
+    for members in groups.values():
+        wcs = get_wcs(headers[members[0]])
+        frame = wcs_to_celestial_frame(wcs)
+        key = repr(frame)
+        if key not in in_frame:
+            # no transformation at all for the frame of the table (FK5 J2000)
+            in_frame[key] = (
+                coords
+                if coords.frame.is_equivalent_frame(frame)
+                else coords.transform_to(frame)
+            )
+        sky = in_frame[key][members]
+        pixels[members] = np.column_stack(
+            wcs.all_world2pix(sky.spherical.lon.deg, sky.spherical.lat.deg, 0)
+        )
+    return pixels
+
+
+def add_center_pixels(table, path_columns: dict):
+    """
+    Add the pixel centers of each disk of table to it
+
+    Parameters
+    ----------
+    table : pd.DataFrame
+        Rows of full_table, with center_x and center_y.
+    path_columns : dict
+        {suffix: path column}, e.g. {"data": "path_data"} adds center_x_pix_data
+        and center_y_pix_data, on the grid of the files of path_data.
+    """
+    table = table.copy()
+    coords = parse_centers(table["center_x"], table["center_y"])
+    for suffix, column in path_columns.items():
+        headers = [read_image_header(path) for path in table[column]]
+        pixels = center_pixels(coords, headers)
+        table[f"center_x_pix_{suffix}"] = pixels[:, 0]
+        table[f"center_y_pix_{suffix}"] = pixels[:, 1]
+    return table
@@ -0,0 +1,142 @@
+"""
+Gaussian smoothing of the Stage 0/1 disks, on the zoom window only and cached
+on disk.
+Only the R_zoom window is shown, so the filter runs on that window plus a halo
+as wide as the kernel (scipy truncates it at 4 sigma): every pixel of the view
+then gets exactly the value of smoothing the full image. The smoothed windows
+are stored in the cache directory under a key made of the identity of the FITS
+file (path, size, mtime), the window and the filter parameters, so repeated
+runs, and runs with another sigma, never filter the same window twice.
+The colour scale of a smoothed panel goes up to the peak of the whole smoothed
+image (what imshow autoscaled to before the windows), not of the window:
+smoothed_peak filters the full image once and caches that value next to the
+windows.
+"""
+
+import hashlib
+import logging
+import os
+
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+from .fits_window import FitsWindow
+
+logger = logging.getLogger(__name__)
+
+# Smoothing of Stage 0/1 disks
+SMOOTH_SIGMA = 2
+SMOOTH_TRUNCATE = 4.0
+SMOOTH_MODE = "nearest"
+# Bump to drop the windows cached by older versions
+SMOOTH_CACHE_VERSION = 1
+
+
+def smooth_halo(sigma: float = SMOOTH_SIGMA, truncate: float = SMOOTH_TRUNCATE) -> int:
+    """Radius in pixels of the kernel of gaussian_filter"""
+    return int(truncate * sigma + 0.5)
+
+
+# Extra pixels read around the zoom window of a smoothed disk
+SMOOTH_HALO = smooth_halo()
+
+
+def _cache_key(path: str, bounds: tuple, sigma: float) -> str:
+    stat = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(
+        repr(
+            (
+                SMOOTH_CACHE_VERSION,
+                os.path.abspath(path),
+                stat.st_size,
+                stat.st_mtime_ns,
+                tuple(int(b) for b in bounds),
+                float(sigma),
+                SMOOTH_TRUNCATE,
+                SMOOTH_MODE,
+            )
+        ).encode()
+    )
+    return h.hexdigest()
+
+
+def smoothed_window(
+    image, center_pix, radius_pix: float, sigma: float = SMOOTH_SIGMA, cache_dir=None
+) -> tuple:
+    """
+    Gaussian smoothed window of image around center_pix
+
+    Parameters
+    ----------
+    image : FitsWindow or CachedImage
+        Image to be smoothed (anything with path, window_bounds and read_window).
+    center_pix, radius_pix :
+        Window shown, as in read_window; the halo of the kernel is added here.
+    sigma : float
+        Standard deviation of the kernel, in pixels.
+    cache_dir : str, optional
+        Directory of the on-disk cache; no cache if None.
+
+    Returns
+    -------
+    Same as read_window with margin=smooth_halo(sigma): (smoothed, (x0, y0)).
+    """
+    halo = smooth_halo(sigma)
+    bounds = image.window_bounds(center_pix, radius_pix, margin=halo)
+    origin = (bounds[0], bounds[2])
+
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = os.path.join(
+            cache_dir, "smoothed", _cache_key(image.path, bounds, sigma) + ".npy"
+        )
+        if os.path.exists(cache_file):
+            return np.load(cache_file), origin
+
+    data, origin = image.read_window(center_pix, radius_pix, margin=halo)
+    smoothed = gaussian_filter(
+        data, sigma=sigma, mode=SMOOTH_MODE, truncate=SMOOTH_TRUNCATE
+    )
+
+    if cache_file is not None:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, mode="wb") as f:
+            np.save(f, smoothed)
+        os.replace(tmp_file, cache_file)
+        logger.debug("Cached smoothed window of %s in %s", image.path, cache_file)
+    return smoothed, origin
+
+
+def smoothed_peak(path: str, sigma: float = SMOOTH_SIGMA, cache_dir=None) -> float:
+    """
+    Finite maximum of the full image of path, gaussian smoothed as the windows
+    of smoothed_window (None if it has no finite pixel); cached in cache_dir
+    """
+    cache_file = None
+    if cache_dir is not None:
+        with FitsWindow(path) as fits_image:
+            ny, nx = fits_image.shape
+        key = _cache_key(path, (0, nx, 0, ny), sigma)
+        cache_file = os.path.join(cache_dir, "smoothed", f"{key}.peak.npy")
+        if os.path.exists(cache_file):
+            peak = float(np.load(cache_file))
+            return None if np.isnan(peak) else peak
+
+    with FitsWindow(path) as fits_image:
+        ny, nx = fits_image.shape
+        data = np.array(fits_image.read_bounds(0, nx, 0, ny))
+    smoothed = gaussian_filter(
+        data, sigma=sigma, mode=SMOOTH_MODE, truncate=SMOOTH_TRUNCATE
+    )
+    finite = np.isfinite(smoothed)
+    peak = float(smoothed[finite].max()) if finite.any() else np.nan
+
+    if cache_file is not None:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, mode="wb") as f:
+            np.save(f, np.float64(peak))
+        os.replace(tmp_file, cache_file)
+    return None if np.isnan(peak) else peak
@@ -0,0 +1,178 @@
+"""
+Timing spans of the stages of the render loop.
+The plotter only reported its total time, which says nothing about where a
+600 dpi pdf spends it. With tracing on, every stage of a disk (profile load,
+FITS reads, WCS, smoothing, figure build, panel draws, pdf / png encoding and
+writing) records a Span, worker processes hand theirs back with each disk, and
+write_trace exports them at the end of the run:
+- spans.csv: every span;
+- stages.csv / stages.json: count, total, mean and max time of each stage;
+- disks.csv: time of each stage for each disk;
+- trace.json: Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+Spans nest (a variant contains its panels, the encoding of its pdf, ...), so
+the totals of the stages are inclusive. Spans recorded by the threads of the
+background writer (utils.background_writer) and of the read-ahead threads
+(utils.read_ahead) carry the disk they work on and their own thread, a track of
+their own in the Chrome trace.
+With tracing off, span() costs a dictionary lookup.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, fields
+
+# State of this process: tracing on / off, disk being rendered, spans recorded
+_state: dict = {"enabled": False, "disk": "", "spans": []}
+# Spans are also recorded by the writer and read-ahead threads
+_lock = threading.Lock()
+# Disk of the spans of a thread other than the render thread (see thread_disk)
+_local = threading.local()
+
+
+@dataclass(frozen=True)
+class Span:
+    """One timed stage"""
+
+    disk: str
+    stage: str
+    start: float  # s since the epoch
+    duration: float  # s
+    pid: int
+    thread: int = 0  # native id of the thread
+
+
+def enable_tracing(enabled: bool = True, disk: str = "") -> None:
+    """Turn tracing on or off in this process, spans are then of disk"""
+    _state["enabled"] = enabled
+    _state["disk"] = disk
+
+
+@contextmanager
+def thread_disk(disk: str):
+    """Spans of this thread recorded inside the block are of disk"""
+    previous = getattr(_local, "disk", None)
+    _local.disk = disk
+    try:
+        yield
+    finally:
+        _local.disk = previous
+
+
+def take_spans() -> list:
+    """Spans recorded by this process since the last call"""
+    with _lock:
+        spans = _state["spans"]
+        _state["spans"] = []
+    return spans
+
+
+@contextmanager
+def span(stage: str, disk: str = None):
+    """
+    Record the time spent inside the block as stage, if tracing is on, for
+    disk (by default the disk of thread_disk, or the one given to
+    enable_tracing)
+    """
+    if not _state["enabled"]:
+        yield
+        return
+    start = time.time()
+    counter = time.perf_counter()
+    try:
+        yield
+    finally:
+        item = Span(
+            disk=disk or getattr(_local, "disk", None) or _state["disk"],
+            stage=stage,
+            start=start,
+            duration=time.perf_counter() - counter,
+            pid=os.getpid(),
+            thread=threading.get_native_id(),
+        )
+        with _lock:
+            _state["spans"].append(item)
+
+
+def profiled(path: str):
+    """Context manager running the block under cProfile, stats dumped to path"""
+    if path is None:
+        return nullcontext()
+    return _profiled(path)
+
+
+@contextmanager
+def _profiled(path: str):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def spans_table(spans: list) -> "pd.DataFrame":
+    """spans as a table, one row per span"""
+    # pandas only when the spans are exported (the CLI imports this module)
+    import pandas as pd
+
+    return pd.DataFrame(
+        [asdict(item) for item in spans], columns=[f.name for f in fields(Span)]
+    )
+
+
+def stage_summary(spans: list) -> "pd.DataFrame":
+    """count, total, mean and max time (s) of every stage, slowest first"""
+    summary = (
+        spans_table(spans)
+        .groupby("stage")["duration"]
+        .agg(count="count", total="sum", mean="mean", max="max")
+        .sort_values("total", ascending=False)
+    )
+    return summary
+
+
+def disk_summary(spans: list) -> "pd.DataFrame":
+    """Total time (s) of every stage (columns) of every disk (rows)"""
+    return spans_table(spans).pivot_table(
+        index="disk", columns="stage", values="duration", aggfunc="sum", fill_value=0
+    )
+
+
+def chrome_trace(spans: list) -> dict:
+    """spans in the Chrome trace event format (complete events, in us)"""
+    origin = min((item.start for item in spans), default=0)
+    return {
+        "traceEvents": [
+            {
+                "name": item.stage,
+                "cat": item.stage.split(":")[0],
+                "ph": "X",
+                "ts": round((item.start - origin) * 1e6, 1),
+                "dur": round(item.duration * 1e6, 1),
+                "pid": item.pid,
+                "tid": item.thread or item.pid,
+                "args": {"disk": item.disk},
+            }
+            for item in spans
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def write_trace(spans: list, directory: str) -> None:
+    """Export spans (see the module docstring) into directory"""
+    os.makedirs(directory, exist_ok=True)
+    spans_table(spans).to_csv(os.path.join(directory, "spans.csv"), index=False)
+    summary = stage_summary(spans)
+    summary.to_csv(os.path.join(directory, "stages.csv"))
+    with open(os.path.join(directory, "stages.json"), mode="w", encoding="utf-8") as f:
+        json.dump(summary.to_dict(orient="index"), f, indent=2)
+    disk_summary(spans).to_csv(os.path.join(directory, "disks.csv"))
+    with open(os.path.join(directory, "trace.json"), mode="w", encoding="utf-8") as f:
+        json.dump(chrome_trace(spans), f)